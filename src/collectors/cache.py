@@ -0,0 +1,81 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class GhCache:
+    """SQLite-backed store of GitHub responses used to send conditional requests"""
+
+    def __init__(self, path: str = "~/.cache/digest/gh.db", max_age_days: int = 30):
+        """
+        Open (and create if needed) the cache database
+
+        Args:
+            path: Location of the SQLite file
+            max_age_days: Entries fetched longer ago than this are evicted on open
+        """
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        # Collection may run on a worker thread's event loop (see github_collector._run_sync);
+        # calls never overlap since that thread's caller waits for it
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS resp("
+            "url TEXT PRIMARY KEY, etag TEXT, modified TEXT, link TEXT, body BLOB, fetched_at INT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS resp_fetched_at ON resp(fetched_at)")
+        # Left behind by earlier versions, which stored urgent commits across runs
+        self.conn.execute("DROP TABLE IF EXISTS urgent_commits")
+        self.conn.commit()
+
+        self.evict(max_age_days)
+
+    def get_headers(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up the validators of a cached response without loading its body
+
+        Returns:
+            (etag, last_modified), both None on a cache miss
+        """
+        row = self.conn.execute("SELECT etag, modified FROM resp WHERE url = ?", (url,)).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def get_body(self, url: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """
+        Load a cached response
+
+        Returns:
+            (body, link_header), or None on a cache miss
+        """
+        row = self.conn.execute("SELECT body, link FROM resp WHERE url = ?", (url,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, url: str, etag: Optional[str], modified: Optional[str], body: bytes, link: Optional[str] = None):
+        """Store a response together with its validators and pagination Link header"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO resp(url, etag, modified, link, body, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (url, etag, modified, link, body, int(time.time()))
+        )
+        self.conn.commit()
+
+    def touch(self, url: str):
+        """Mark a cached response as still valid after a 304 Not Modified"""
+        self.conn.execute("UPDATE resp SET fetched_at = ? WHERE url = ?", (int(time.time()), url))
+        self.conn.commit()
+
+    def evict(self, max_age_days: int):
+        """Remove entries fetched more than max_age_days ago"""
+        cutoff = int(time.time()) - max_age_days * 86400
+        deleted = self.conn.execute("DELETE FROM resp WHERE fetched_at < ?", (cutoff,)).rowcount
+        self.conn.commit()
+        if deleted:
+            logger.info(f"Evicted {deleted} stale GitHub cache entries")
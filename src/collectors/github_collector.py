@@ -1,166 +1,197 @@
+import asyncio
+import heapq
+import importlib.util
 import logging
 import os
 import json
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from itertools import compress
+from typing import Dict, Any, List, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+import httpx
 from github import Github
+from github.Repository import Repository
 from dotenv import load_dotenv
-from utils.ai_summarizer import BedrockSummarizer
+from utils.ai_summarizer import BedrockSummarizer, MAX_INLINE_PATCH_BYTES, truncate_patch
+from collectors.cache import GhCache
+from collectors.keyword_scan import find_urgent
+from collectors.rate_limiter import GhRateLimiter, MAX_RETRIES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+GITHUB_API_URL = "https://api.github.com"
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Characters of patch text kept per PR for the analysis prompt; file metadata is always kept
+PR_PROMPT_BUDGET = 30_000
+
+T = TypeVar("T")
+
+
+def _run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code
+    
+    asyncio.run refuses to start inside a running event loop (e.g. an async bot handler),
+    so there the coroutine runs on its own loop in a worker thread. That still blocks the
+    calling loop until it finishes; async callers should await acollect() instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse a GitHub ISO-8601 timestamp into an aware datetime"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _format_minute(value: datetime) -> str:
+    """Format a datetime as 'YYYY-MM-DD HH:MM', dropping any UTC offset"""
+    return value.isoformat(sep=" ", timespec="minutes")[:16]
+
+
+def _login(user: Optional[Dict[str, Any]]) -> str:
+    """Return the login of a GitHub user payload"""
+    return user["login"] if user else "Unknown"
+
+
+def _graphql_digest_query(repos: List[str], since: datetime) -> str:
+    """
+    Build a single GraphQL query fetching open PRs, merged PRs and recent commits
+    of every repository, using one aliased repository() field per repo
+    
+    Args:
+        repos: Repository names (e.g. 'organization/repo')
+        since: Only include commits after this time
+    Returns:
+        GraphQL query string
+    """
+    fields = []
+    for index, repo_name in enumerate(repos):
+        owner, name = repo_name.split("/", 1)
+        fields.append(f"""
+  r{index}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{
+    open: pullRequests(states: OPEN, first: 100, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+      pageInfo {{ hasNextPage }}
+      nodes {{
+        number title url createdAt
+        author {{ login }}
+        reviewRequests(first: 10) {{ nodes {{ requestedReviewer {{ ... on User {{ login }} }} }} }}
+      }}
+    }}
+    merged: pullRequests(states: MERGED, first: 50, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+      pageInfo {{ hasNextPage }}
+      nodes {{ number title url mergedAt updatedAt author {{ login }} mergedBy {{ login }} }}
+    }}
+    defaultBranchRef {{
+      target {{
+        ... on Commit {{
+          history(since: {json.dumps(since.isoformat())}, first: 100) {{
+            pageInfo {{ hasNextPage }}
+            nodes {{ oid message url author {{ name date user {{ login }} }} }}
+          }}
+        }}
+      }}
+    }}
+  }}""")
+    
+    return "query {\n  rateLimit { cost remaining }" + "".join(fields) + "\n}"
+
+
 class GithubCollector:
     """Collector for GitHub repository data"""
     
+    # Bedrock summarizer shared by all collectors in the process, created on first use
+    _summarizer: Optional[BedrockSummarizer] = None
+    _summarizer_lock = threading.Lock()
+    
     def __init__(self):
         """Initialize GitHub client"""
         # Load environment variables if not already loaded
         load_dotenv()
         
         self.github_token = os.getenv("GITHUB_TOKEN")
+        # Optional extra tokens to spread REST calls across (GITHUB_TOKENS=t1,t2,...)
+        self.github_tokens = [t.strip() for t in os.getenv("GITHUB_TOKENS", "").split(",") if t.strip()]
+        if not self.github_tokens and self.github_token:
+            self.github_tokens = [self.github_token]
         self.repos = os.getenv("GITHUB_REPOS", "").split(",")
         self.ai_summarizer = None
+        self._repo_cache: Dict[str, Repository] = {}
+        
+        # Conditional-request cache; 304 responses don't count against the rate limit
+        self.cache = None
+        try:
+            self.cache = GhCache(os.getenv("GITHUB_CACHE_PATH", "~/.cache/digest/gh.db"))
+        except Exception as e:
+            logger.warning(f"GitHub response cache unavailable: {str(e)}")
         
         self.client = None
         try:
             if self.github_token:
-                self.client = Github(self.github_token)
+                self.client = Github(self.github_token, per_page=100)
                 logger.info("GitHub client initialized successfully")
             else:
                 logger.warning("GitHub token not provided. Set GITHUB_TOKEN in .env file.")
         except Exception as e:
             logger.error(f"Failed to initialize GitHub client: {str(e)}")
     
+    def _repo_names(self) -> List[str]:
+        """Return configured repository names, skipping blank entries"""
+        return [name.strip() for name in self.repos if name.strip()]
+    
+    @classmethod
+    def _get_summarizer(cls) -> BedrockSummarizer:
+        """Return the shared summarizer, so the boto3 session and client are built once per process"""
+        # PR analyses run in worker threads, so guard against building it twice
+        with cls._summarizer_lock:
+            if cls._summarizer is None:
+                cls._summarizer = BedrockSummarizer()
+        return cls._summarizer
+    
+    def _repo(self, repo_name: str) -> Repository:
+        """Get a repository, reusing the object fetched earlier in this run"""
+        repo = self._repo_cache.get(repo_name)
+        if repo is None:
+            repo = self.client.get_repo(repo_name)
+            self._repo_cache[repo_name] = repo
+        return repo
+    
     def get_open_prs(self) -> List[Dict[str, Any]]:
         """Get open pull requests waiting for review"""
-        if not self.client or not self.repos or self.repos == [""]:
+        if not self.client or not self._repo_names():
             logger.warning("GitHub client not initialized or no repositories configured")
             return []
         
-        open_prs = []
-        
-        try:
-            for repo_name in self.repos:
-                repo_name = repo_name.strip()
-                if not repo_name:
-                    continue
-                    
-                logger.info(f"Fetching open PRs from {repo_name}")
-                repo = self.client.get_repo(repo_name)
-                pulls = repo.get_pulls(state='open')
-                
-                for pr in pulls:
-                    # Get reviewers
-                    reviewers = []
-                    try:
-                        review_requests = pr.get_review_requests()
-                        reviewers = [reviewer.login for reviewer in review_requests[0]]
-                    except Exception as e:
-                        logger.debug(f"Could not fetch reviewers for PR #{pr.number}: {str(e)}")
-                    
-                    pr_data = {
-                        "number": pr.number,
-                        "title": pr.title,
-                        "url": pr.html_url,
-                        "author": pr.user.login if pr.user else "Unknown",
-                        "created_at": pr.created_at.strftime("%Y-%m-%d"),
-                        "days_open": (datetime.now(pr.created_at.tzinfo) - pr.created_at).days,
-                        "repository": repo_name,
-                        "reviewers": reviewers
-                    }
-                    open_prs.append(pr_data)
-            
-            logger.info(f"Found {len(open_prs)} open PRs")
-            return open_prs
-            
-        except Exception as e:
-            logger.error(f"Error fetching open PRs: {str(e)}")
-            return []
+        return _run_sync(self._with_http_client(self._get_open_prs_async))
     
     def get_recent_merges(self) -> List[Dict[str, Any]]:
         """Get PRs merged in the last 24 hours"""
-        if not self.client or not self.repos or self.repos == [""]:
+        if not self.client or not self._repo_names():
             logger.warning("GitHub client not initialized or no repositories configured")
             return []
         
-        yesterday = datetime.now(datetime.timezone.utc) - timedelta(days=1)
-        merged_prs = []
-        
-        try:
-            for repo_name in self.repos:
-                repo_name = repo_name.strip()
-                if not repo_name:
-                    continue
-                    
-                logger.info(f"Fetching recent merges from {repo_name}")
-                repo = self.client.get_repo(repo_name)
-                pulls = repo.get_pulls(state='closed', sort='updated', direction='desc')
-                
-                for pr in pulls:
-                    if pr.merged and pr.merged_at and pr.merged_at > yesterday:
-                        pr_data = {
-                            "number": pr.number,
-                            "title": pr.title,
-                            "url": pr.html_url,
-                            "author": pr.user.login if pr.user else "Unknown",
-                            "merged_at": pr.merged_at.strftime("%Y-%m-%d %H:%M"),
-                            "repository": repo_name,
-                            "merged_by": pr.merged_by.login if pr.merged_by else "Unknown"
-                        }
-                        merged_prs.append(pr_data)
-            
-            logger.info(f"Found {len(merged_prs)} PRs merged in the last 24 hours")
-            return merged_prs
-            
-        except Exception as e:
-            logger.error(f"Error fetching recent merges: {str(e)}")
-            return []
+        return _run_sync(self._with_http_client(self._get_recent_merges_async))
     
     def get_urgent_commits(self) -> List[Dict[str, Any]]:
         """Get commits with urgent keywords in the last 24 hours"""
-        if not self.client or not self.repos or self.repos == [""]:
+        if not self.client or not self._repo_names():
             logger.warning("GitHub client not initialized or no repositories configured")
             return []
         
-        yesterday = datetime.now() - timedelta(days=1)
-        urgent_keywords = ["fix", "hotfix", "urgent", "emergency", "critical", "bug"]
-        urgent_commits = []
-        
-        try:
-            for repo_name in self.repos:
-                repo_name = repo_name.strip()
-                if not repo_name:
-                    continue
-                    
-                logger.info(f"Fetching recent commits from {repo_name}")
-                repo = self.client.get_repo(repo_name)
-                commits = repo.get_commits(since=yesterday)
-                
-                for commit in commits:
-                    message = commit.commit.message.lower()
-                    if any(keyword in message for keyword in urgent_keywords):
-                        try:
-                            commit_data = {
-                                "sha": commit.sha[:7],
-                                "message": commit.commit.message.split("\n")[0],  # First line only
-                                "url": commit.html_url,
-                                "author": commit.author.login if commit.author else commit.commit.author.name,
-                                "date": commit.commit.author.date.strftime("%Y-%m-%d %H:%M"),
-                                "repository": repo_name
-                            }
-                            urgent_commits.append(commit_data)
-                        except Exception as e:
-                            logger.debug(f"Error processing commit {commit.sha}: {str(e)}")
-            
-            logger.info(f"Found {len(urgent_commits)} urgent commits in the last 24 hours")
-            return urgent_commits
-            
-        except Exception as e:
-            logger.error(f"Error fetching urgent commits: {str(e)}")
-            return []
-            
+        return _run_sync(self._with_http_client(self._get_urgent_commits_async))
+    
     def analyze_pr(self, repo_name: str, pr_number: int) -> Dict[str, Any]:
         """
         Analyze a PR with AI
@@ -178,7 +209,7 @@ class GithubCollector:
             logger.info(f"Analyzing PR #{pr_number} in {repo_name}")
             
             # Get the PR
-            repo = self.client.get_repo(repo_name)
+            repo = self._repo(repo_name)
             pr = repo.get_pull(pr_number)
             
             # Get the diff
@@ -186,24 +217,12 @@ class GithubCollector:
                 "title": pr.title,
                 "body": pr.body,
                 "user": pr.user.login if pr.user else "Unknown",
-                "created_at": pr.created_at.strftime("%Y-%m-%d"),
+                "created_at": pr.created_at.date().isoformat(),
                 "files": []
             }
             
-            # Get files changed
-            files = pr.get_files()
-            for file in files:
-                file_data = {
-                    "filename": file.filename,
-                    "status": file.status,  # added, modified, removed
-                    "additions": file.additions,
-                    "deletions": file.deletions,
-                    "patch": file.patch  # The actual diff content
-                }
-                diff_data["files"].append(file_data)
-            
             # Create the prompt for AI analysis
-            prompt = f"""You are a senior software engineer.
+            parts = [f"""You are a senior software engineer.
 Summarize this pull request in plain English.
 Then suggest 3-5 relevant unit test cases based on the logic in the diff.
 
@@ -212,20 +231,41 @@ Author: {diff_data.get('user')}
 Description: {diff_data.get('body', 'No description provided.')}
 
 Changed files:
-"""
-
-            # Add file changes to prompt
-            for file in diff_data.get("files", []):
-                prompt += f"\nFile: {file.get('filename')}"
-                prompt += f"\nStatus: {file.get('status')}"
-                prompt += f"\nChanges: +{file.get('additions')} -{file.get('deletions')} lines"
+"""]
+            
+            # Keep every changed file, but only as much patch text as the summarizer can use. It adds
+            # patches smallest change first, so once the kept patches exceed the budget, those of the
+            # largest changes are dropped again; long patches are cut to the head and tail it would use
+            files = diff_data["files"]
+            budget = PR_PROMPT_BUDGET
+            kept = []  # heap of (-changes, -index) of the files whose patch is kept, largest change first
+            for file in pr.get_files():
+                patch = truncate_patch(file.patch) if file.patch else None
+                files.append({
+                    "filename": file.filename,
+                    "status": file.status,  # added, modified, removed
+                    "additions": file.additions,
+                    "deletions": file.deletions,
+                    "patch": patch
+                })
+                if not patch:
+                    continue
                 
-                # Add the patch/diff if it's not too large
-                patch = file.get("patch")
-                if patch and len(patch) < 3000:  # Limit patch size
-                    prompt += f"\n```\n{patch}\n```\n"
-                else:
-                    prompt += "\n[Diff too large to include]\n"
+                heapq.heappush(kept, (-(file.additions + file.deletions), -(len(files) - 1)))
+                budget -= len(patch)
+                while budget < 0:
+                    dropped = files[-heapq.heappop(kept)[1]]
+                    budget += len(dropped["patch"])
+                    dropped["patch"] = None
+            
+            for file in files:
+                patch = file["patch"]
+                parts.append(f"\nFile: {file['filename']}\nStatus: {file['status']}\n"
+                             f"Changes: +{file['additions']} -{file['deletions']} lines")
+                inline = bool(patch) and len(patch) < MAX_INLINE_PATCH_BYTES
+                parts.append(f"\n```\n{patch}\n```\n" if inline else "\n[Diff too large to include]\n")
+            
+            prompt = "".join(parts)
             
             # Here you would call your AI service to analyze the PR
             # For now, we'll just create a placeholder
@@ -239,8 +279,9 @@ Changed files:
             #analysis_text += "1. Test case for basic functionality\n"
             #analysis_text += "2. Test case for edge conditions\n"
             #analysis_text += "3. Test case for error handling"
-            if self.ai_summarizer:
-                analysis_text = self.ai_summarizer.analyze_pr_diff(diff_data)
+            summarizer = self.ai_summarizer or self._get_summarizer()
+            if summarizer.client and summarizer.model_id:
+                analysis_text = summarizer.analyze_pr_diff(diff_data)
             else:
                 # Use placeholder if AI is not available
                 analysis_text = f"PR Analysis for {repo_name}#{pr_number}: {pr.title}\n"
@@ -262,27 +303,47 @@ Changed files:
             logger.error(f"Error analyzing PR {repo_name}#{pr_number}: {str(e)}")
             return {}
     
-    def get_pr_analyses(self) -> List[Dict[str, Any]]:
-        """Analyze recent or important PRs"""
-        if not self.client or not self.repos or self.repos == [""]:
+    async def _analyze_pr_async(self, repo_name: str, pr_number: int, sem: asyncio.Semaphore) -> Dict[str, Any]:
+        """Run analyze_pr in a worker thread, holding a slot of the given semaphore"""
+        async with sem:
+            return await asyncio.to_thread(self.analyze_pr, repo_name, pr_number)
+    
+    async def _get_pr_analyses_async(self, open_prs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze up to 3 PRs concurrently"""
+        sem = asyncio.Semaphore(3)
+        targets = [pr for pr in open_prs[:3] if pr.get("repository") and pr.get("number")]
+        results = await asyncio.gather(
+            *[self._analyze_pr_async(pr["repository"], pr["number"], sem) for pr in targets],
+            return_exceptions=True
+        )
+        
+        analyses = []
+        for pr, result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error analyzing PR {pr['repository']}#{pr['number']}: {str(result)}")
+            elif result:
+                analyses.append(result)
+        return analyses
+    
+    async def aget_pr_analyses(self, open_prs: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Analyze recent or important PRs
+        Args:
+            open_prs: Open PRs already collected in this run, fetched again if not given
+        Returns:
+            List of PR analyses
+        """
+        if not self.client or not self._repo_names():
             logger.warning("GitHub client not initialized or no repositories configured")
             return []
-            
-        analyses = []
         
         try:
             # Get open PRs
-            open_prs = self.get_open_prs()
+            if open_prs is None:
+                open_prs = await self._with_http_client(self._get_open_prs_async)
             
-            # Analyze up to 3 most recent PRs
-            for pr in open_prs[:3]:
-                repo_name = pr.get("repository")
-                pr_number = pr.get("number")
-                
-                if repo_name and pr_number:
-                    analysis = self.analyze_pr(repo_name, pr_number)
-                    if analysis:
-                        analyses.append(analysis)
+            # Analyze up to 3 most recent PRs, each waiting mostly on GitHub and Bedrock I/O
+            analyses = await self._get_pr_analyses_async(open_prs)
             
             logger.info(f"Generated {len(analyses)} PR analyses")
             return analyses
@@ -291,17 +352,341 @@ Changed files:
             logger.error(f"Error generating PR analyses: {str(e)}")
             return []
     
-    def collect(self) -> Dict[str, Any]:
-        """Collect all GitHub data"""
+    def get_pr_analyses(self, open_prs: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Synchronous version of aget_pr_analyses"""
+        return _run_sync(self.aget_pr_analyses(open_prs))
+    
+    def _http_client(self) -> httpx.AsyncClient:
+        """
+        Create an async GitHub REST client that shares one connection pool
+        
+        A fresh rate limiter is created alongside the client since its semaphore
+        belongs to the running event loop. It is attached to the client as
+        client.rate_limiter, so clients used concurrently each keep the limiter
+        that their response hook updates.
+        """
+        rate_limiter = GhRateLimiter(self.github_tokens)
+        client = httpx.AsyncClient(
+            base_url=GITHUB_API_URL,
+            http2=_HTTP2_AVAILABLE,
+            headers={"Accept": "application/vnd.github+json"},
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=64),
+            timeout=30.0,
+            event_hooks={"response": [rate_limiter.update_from_response]}
+        )
+        client.rate_limiter = rate_limiter
+        return client
+    
+    async def _with_http_client(self, fetch: Callable[[httpx.AsyncClient], Awaitable[T]]) -> T:
+        """Run a single fetch over its own HTTP client"""
+        async with self._http_client() as client:
+            return await fetch(client)
+    
+    async def _request(self, client: httpx.AsyncClient, method: str, url: str, cache: bool = True,
+                       **kwargs) -> httpx.Response:
+        """
+        Send a request through the rate limiter, backing off when GitHub throttles it
+        
+        GET requests are made conditional on the cached ETag/Last-Modified, and a
+        304 Not Modified is answered from the cache. Pass cache=False for URLs that
+        change on every run, whose cache entries would never be reused.
+        """
+        rate_limiter = client.rate_limiter
+        for attempt in range(MAX_RETRIES + 1):
+            token = await rate_limiter.acquire()
+            try:
+                request = client.build_request(method, url, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+                cache_key = str(request.url) if cache and self.cache and method == "GET" else None
+                if cache_key:
+                    etag, modified = self.cache.get_headers(cache_key)
+                    if etag:
+                        request.headers["If-None-Match"] = etag
+                    if modified:
+                        request.headers["If-Modified-Since"] = modified
+                response = await client.send(request)
+            finally:
+                rate_limiter.release()
+            
+            if cache_key and response.status_code == 304:
+                cached = self.cache.get_body(cache_key)
+                if cached:
+                    body, link = cached
+                    self.cache.touch(cache_key)
+                    return httpx.Response(200, content=body, headers={"Link": link} if link else None, request=request)
+            
+            delay = rate_limiter.retry_delay(response, attempt)
+            if delay is None or attempt == MAX_RETRIES:
+                response.raise_for_status()
+                if cache_key and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+                    self.cache.put(cache_key, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                                   response.content, response.headers.get("Link"))
+                return response
+            
+            logger.warning(f"GitHub rate limited {url}, retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+    
+    async def _paginate(self, client: httpx.AsyncClient, url: str,
+                        params: Optional[Dict[str, Any]] = None,
+                        cache: bool = True) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield each page of a list endpoint, following Link rel="next" headers"""
+        while url:
+            response = await self._request(client, "GET", url, cache=cache, params=params)
+            yield response.json()
+            url = response.links.get("next", {}).get("url")
+            # The next link already carries the query string
+            params = None
+    
+    async def _fetch_open_prs(self, client: httpx.AsyncClient, repo_name: str) -> List[Dict[str, Any]]:
+        """Fetch open PRs of a single repository"""
+        logger.info(f"Fetching open PRs from {repo_name}")
+        now = datetime.now(timezone.utc)
+        open_prs = []
+        
+        pages = self._paginate(client, f"/repos/{repo_name}/pulls", {"state": "open", "per_page": 100})
+        async for page in pages:
+            for pr in page:
+                created_at = _parse_timestamp(pr["created_at"])
+                open_prs.append({
+                    "number": pr["number"],
+                    "title": pr["title"],
+                    "url": pr["html_url"],
+                    "author": _login(pr.get("user")),
+                    "created_at": created_at.date().isoformat(),
+                    "days_open": (now - created_at).days,
+                    "repository": repo_name,
+                    # Requested reviewers are part of the list payload, no extra round-trip needed
+                    "reviewers": [reviewer["login"] for reviewer in pr.get("requested_reviewers") or []]
+                })
+        
+        return open_prs
+    
+    async def _fetch_recent_merges(self, client: httpx.AsyncClient, repo_name: str) -> List[Dict[str, Any]]:
+        """Fetch PRs of a single repository merged in the last 24 hours"""
+        logger.info(f"Fetching recent merges from {repo_name}")
+        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+        merged = []
+        
+        params = {"state": "closed", "sort": "updated", "direction": "desc", "per_page": 100}
+        async with aclosing(self._paginate(client, f"/repos/{repo_name}/pulls", params)) as pages:
+            async for page in pages:
+                for pr in page:
+                    if pr.get("merged_at") and _parse_timestamp(pr["merged_at"]) > yesterday:
+                        merged.append(pr)
+                    elif _parse_timestamp(pr["updated_at"]) < yesterday:
+                        # Sorted by last update, so no later PR can have been merged since yesterday
+                        break
+                else:
+                    continue
+                break
+        
+        # merged_by is only returned by the single-PR endpoint, so fetch those concurrently
+        details = await asyncio.gather(*(
+            self._request(client, "GET", f"/repos/{repo_name}/pulls/{pr['number']}") for pr in merged
+        ))
+        
+        merged_prs = []
+        for pr, detail in zip(merged, details):
+            merged_prs.append({
+                "number": pr["number"],
+                "title": pr["title"],
+                "url": pr["html_url"],
+                "author": _login(pr.get("user")),
+                "merged_at": _format_minute(_parse_timestamp(pr["merged_at"])),
+                "repository": repo_name,
+                "merged_by": _login(detail.json().get("merged_by"))
+            })
+        
+        return merged_prs
+    
+    async def _fetch_urgent_commits(self, client: httpx.AsyncClient, repo_name: str) -> List[Dict[str, Any]]:
+        """Fetch commits of a single repository with urgent keywords in the last 24 hours"""
+        logger.info(f"Fetching recent commits from {repo_name}")
+        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+        urgent_commits = []
+        
+        # The since= timestamp changes on every run, so these pages are never cached
+        params = {"since": yesterday.isoformat(), "per_page": 100}
+        commits = [commit async for page in self._paginate(client, f"/repos/{repo_name}/commits", params, cache=False)
+                   for commit in page]
+        
+        for commit in compress(commits, find_urgent([c["commit"]["message"] for c in commits])):
+            try:
+                date = _parse_timestamp(commit["commit"]["author"]["date"])
+                urgent_commits.append({
+                    "sha": commit["sha"][:7],
+                    "message": commit["commit"]["message"].partition("\n")[0],  # First line only
+                    "url": commit["html_url"],
+                    "author": commit["author"]["login"] if commit.get("author") else commit["commit"]["author"]["name"],
+                    "date": _format_minute(date),
+                    "repository": repo_name
+                })
+            except Exception as e:
+                logger.debug(f"Error processing commit {commit.get('sha')}: {str(e)}")
+        
+        return urgent_commits
+    
+    async def _get_open_prs_async(self, client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+        """Get open pull requests from all repositories concurrently"""
+        try:
+            results = await asyncio.gather(*(self._fetch_open_prs(client, name) for name in self._repo_names()))
+            open_prs = [pr for repo_prs in results for pr in repo_prs]
+            logger.info(f"Found {len(open_prs)} open PRs")
+            return open_prs
+        except Exception as e:
+            logger.error(f"Error fetching open PRs: {str(e)}")
+            return []
+    
+    async def _get_recent_merges_async(self, client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+        """Get PRs merged in the last 24 hours from all repositories concurrently"""
+        try:
+            results = await asyncio.gather(*(self._fetch_recent_merges(client, name) for name in self._repo_names()))
+            merged_prs = [pr for repo_prs in results for pr in repo_prs]
+            logger.info(f"Found {len(merged_prs)} PRs merged in the last 24 hours")
+            return merged_prs
+        except Exception as e:
+            logger.error(f"Error fetching recent merges: {str(e)}")
+            return []
+    
+    async def _get_urgent_commits_async(self, client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+        """Get urgent commits from all repositories concurrently"""
+        try:
+            results = await asyncio.gather(*(self._fetch_urgent_commits(client, name) for name in self._repo_names()))
+            urgent_commits = [commit for repo_commits in results for commit in repo_commits]
+            logger.info(f"Found {len(urgent_commits)} urgent commits in the last 24 hours")
+            return urgent_commits
+        except Exception as e:
+            logger.error(f"Error fetching urgent commits: {str(e)}")
+            return []
+    
+    async def _collect_graphql(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        """Fetch open PRs, recent merges and urgent commits of all repositories in one GraphQL query"""
+        repos = self._repo_names()
+        now = datetime.now(timezone.utc)
+        yesterday = now - timedelta(days=1)
+        
+        logger.info(f"Fetching GitHub data for {len(repos)} repositories via GraphQL")
+        query = _graphql_digest_query(repos, yesterday)
+        response = await self._request(client, "POST", "/graphql", json={"query": query})
+        payload = response.json()
+        if payload.get("errors"):
+            raise RuntimeError(f"GraphQL query failed: {payload['errors']}")
+        
+        result = payload["data"]
+        rate_limit = result.get("rateLimit") or {}
+        logger.info(f"GraphQL query cost {rate_limit.get('cost')} points, {rate_limit.get('remaining')} remaining this hour")
+        
+        open_prs = []
+        recent_merges = []
+        urgent_commits = []
+        # Connections that did not fit in one page are re-fetched through the paginated REST endpoints
+        overflow = []
+        
+        for index, repo_name in enumerate(repos):
+            repo = result[f"r{index}"]
+            
+            if repo["open"]["pageInfo"]["hasNextPage"]:
+                overflow.append(("open_prs", self._fetch_open_prs(client, repo_name)))
+            else:
+                for pr in repo["open"]["nodes"]:
+                    created_at = _parse_timestamp(pr["createdAt"])
+                    reviewers = [r["requestedReviewer"]["login"] for r in pr["reviewRequests"]["nodes"]
+                                 if (r.get("requestedReviewer") or {}).get("login")]
+                    open_prs.append({
+                        "number": pr["number"],
+                        "title": pr["title"],
+                        "url": pr["url"],
+                        "author": _login(pr.get("author")),
+                        "created_at": created_at.date().isoformat(),
+                        "days_open": (now - created_at).days,
+                        "repository": repo_name,
+                        "reviewers": reviewers
+                    })
+            
+            merged_nodes = repo["merged"]["nodes"]
+            if repo["merged"]["pageInfo"]["hasNextPage"] and _parse_timestamp(merged_nodes[-1]["updatedAt"]) > yesterday:
+                overflow.append(("recent_merges", self._fetch_recent_merges(client, repo_name)))
+            else:
+                for pr in merged_nodes:
+                    merged_at = _parse_timestamp(pr["mergedAt"])
+                    if merged_at > yesterday:
+                        recent_merges.append({
+                            "number": pr["number"],
+                            "title": pr["title"],
+                            "url": pr["url"],
+                            "author": _login(pr.get("author")),
+                            "merged_at": _format_minute(merged_at),
+                            "repository": repo_name,
+                            "merged_by": _login(pr.get("mergedBy"))
+                        })
+            
+            history = ((repo.get("defaultBranchRef") or {}).get("target") or {}).get("history")
+            if not history:
+                continue
+            if history["pageInfo"]["hasNextPage"]:
+                overflow.append(("urgent_commits", self._fetch_urgent_commits(client, repo_name)))
+                continue
+            commits = history["nodes"]
+            for commit in compress(commits, find_urgent([c["message"] for c in commits])):
+                author = commit["author"]
+                date = _parse_timestamp(author["date"])
+                urgent_commits.append({
+                    "sha": commit["oid"][:7],
+                    "message": commit["message"].partition("\n")[0],  # First line only
+                    "url": commit["url"],
+                    "author": author["user"]["login"] if author.get("user") else author["name"],
+                    "date": _format_minute(date),
+                    "repository": repo_name
+                })
+        
         data = {
-            "open_prs": self.get_open_prs(),
-            "recent_merges": self.get_recent_merges(),
-            "urgent_commits": self.get_urgent_commits()
+            "open_prs": open_prs,
+            "recent_merges": recent_merges,
+            "urgent_commits": urgent_commits
         }
+        results = await asyncio.gather(*(fetch for _, fetch in overflow))
+        for (key, _), items in zip(overflow, results):
+            data[key].extend(items)
+        
+        logger.info(f"Found {len(open_prs)} open PRs, {len(recent_merges)} PRs merged and "
+                    f"{len(urgent_commits)} urgent commits in the last 24 hours")
+        return data
+    
+    async def _collect_async(self) -> Dict[str, Any]:
+        """Fetch open PRs, recent merges and urgent commits concurrently over one HTTP client"""
+        async with self._http_client() as client:
+            if os.getenv("GITHUB_USE_GRAPHQL", "true").lower() == "true":
+                try:
+                    return await self._collect_graphql(client)
+                except Exception as e:
+                    logger.warning(f"GraphQL digest query failed, falling back to REST: {str(e)}")
+            
+            open_prs, recent_merges, urgent_commits = await asyncio.gather(
+                self._get_open_prs_async(client),
+                self._get_recent_merges_async(client),
+                self._get_urgent_commits_async(client)
+            )
+        
+        return {
+            "open_prs": open_prs,
+            "recent_merges": recent_merges,
+            "urgent_commits": urgent_commits
+        }
+    
+    async def acollect(self) -> Dict[str, Any]:
+        """Collect all GitHub data; use this rather than collect() inside a running event loop"""
+        if not self.client or not self._repo_names():
+            logger.warning("GitHub client not initialized or no repositories configured")
+            data = {"open_prs": [], "recent_merges": [], "urgent_commits": []}
+        else:
+            data = await self._collect_async()
         
         # Optionally add PR analyses - this might be expensive in terms of API calls and tokens
         # so we'll make it optional based on an environment variable
         if os.getenv("ENABLE_PR_ANALYSIS", "false").lower() == "true":
-            data["pr_analyses"] = self.get_pr_analyses()
+            data["pr_analyses"] = await self.aget_pr_analyses(data["open_prs"])
         
         return data
+    
+    def collect(self) -> Dict[str, Any]:
+        """Collect all GitHub data"""
+        return _run_sync(self.acollect())
@@ -0,0 +1,92 @@
+from collections import deque
+from typing import Callable, List, Sequence, Tuple
+import numpy as np
+from numba import njit, prange
+
+# Imported lazily by keyword_scan, only for batches large enough to repay loading Numba
+
+
+def _build_automaton(keywords: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build an Aho-Corasick DFA over bytes that matches the keywords case-insensitively
+
+    Args:
+        keywords: Lowercase ASCII keywords
+
+    Returns:
+        (transitions, accept) where transitions has shape (num_states, 256)
+    """
+    goto = [{}]
+    accept = [False]
+    for keyword in keywords:
+        state = 0
+        for byte in keyword.lower().encode("ascii"):
+            if byte not in goto[state]:
+                goto.append({})
+                accept.append(False)
+                goto[state][byte] = len(goto) - 1
+            state = goto[state][byte]
+        accept[state] = True
+
+    transitions = np.zeros((len(goto), 256), dtype=np.int16)
+    fail = [0] * len(goto)
+    queue = deque()
+    for byte, state in goto[0].items():
+        transitions[0, byte] = state
+        queue.append(state)
+
+    # Breadth-first, so a state's failure link is always resolved before the state itself
+    while queue:
+        state = queue.popleft()
+        accept[state] = accept[state] or accept[fail[state]]
+        for byte in range(256):
+            target = goto[state].get(byte)
+            if target is None:
+                transitions[state, byte] = transitions[fail[state], byte]
+            else:
+                fail[target] = transitions[fail[state], byte]
+                transitions[state, byte] = target
+                queue.append(target)
+
+    # Fold ASCII case by letting uppercase bytes follow the lowercase transitions
+    for byte in range(ord("A"), ord("Z") + 1):
+        transitions[:, byte] = transitions[:, byte + 32]
+
+    return transitions, np.array(accept, dtype=np.bool_)
+
+
+@njit(parallel=True, cache=True)
+def _scan(buf, offsets, transitions, accept):
+    """Flag each message (buf[offsets[i]:offsets[i + 1]]) that contains a keyword"""
+    count = len(offsets) - 1
+    hits = np.zeros(count, np.bool_)
+    for i in prange(count):
+        state = 0
+        for j in range(offsets[i], offsets[i + 1]):
+            state = transitions[state, buf[j]]
+            if accept[state]:
+                hits[i] = True
+                break
+    return hits
+
+
+def build_scanner(keywords: Sequence[str]) -> Callable[[Sequence[str]], List[bool]]:
+    """
+    Build a function that flags the messages containing any of the keywords
+
+    Args:
+        keywords: Lowercase ASCII keywords
+
+    Returns:
+        Scanner taking a batch of messages and returning one flag per message
+    """
+    transitions, accept = _build_automaton(keywords)
+
+    def scan(messages: Sequence[str]) -> List[bool]:
+        encoded = [message.encode("utf-8") for message in messages]
+        buf = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(message) for message in encoded], out=offsets[1:])
+        return _scan(buf, offsets, transitions, accept).tolist()
+
+    return scan
@@ -0,0 +1,50 @@
+import functools
+import logging
+import re
+from typing import Callable, List, Optional, Sequence
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Commit messages containing any of these keywords are reported as urgent.
+# Matched as substrings (so "fixed" and "bugfix" count), ignoring ASCII case only,
+# which is what the byte-level Numba scanner does too
+URGENT_KEYWORDS = ("fix", "hotfix", "urgent", "emergency", "critical", "bug")
+URGENT_RE = re.compile("|".join(map(re.escape, URGENT_KEYWORDS)), re.IGNORECASE | re.ASCII)
+
+# Importing Numba and loading the compiled kernel costs about 0.7s per process, while the regex
+# takes about 5µs per message and the kernel about 0.6µs, so the kernel only pays off for
+# batches of roughly 200k messages or more
+NUMBA_THRESHOLD = 200_000
+
+
+@functools.lru_cache(maxsize=None)
+def _load_scanner() -> Optional[Callable[[Sequence[str]], List[bool]]]:
+    """Import Numba (an optional dependency) and build the parallel scanner, on first use"""
+    try:
+        from collectors.keyword_kernel import build_scanner
+    except ImportError:
+        return None
+    return build_scanner(URGENT_KEYWORDS)
+
+
+def find_urgent(messages: Sequence[str]) -> List[bool]:
+    """
+    Check which commit messages contain an urgent keyword
+
+    Very large batches are scanned by a parallel Numba kernel over one flat byte
+    buffer when Numba is installed; everything else uses the precompiled regex.
+
+    Args:
+        messages: Commit messages to check
+
+    Returns:
+        One flag per message
+    """
+    scanner = _load_scanner() if len(messages) >= NUMBA_THRESHOLD else None
+    if scanner is None:
+        return [URGENT_RE.search(message) is not None for message in messages]
+
+    logger.debug(f"Scanning {len(messages)} commit messages with the Numba keyword scanner")
+    return scanner(messages)
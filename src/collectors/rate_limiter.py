@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+import httpx
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Back-off schedule for throttled requests without a Retry-After header: 1, 2, 4, 8, 16, 32 seconds
+MAX_RETRIES = 6
+MAX_BACKOFF_SECONDS = 32
+
+
+class GhRateLimiter:
+    """Shares the GitHub rate-limit budget of one or more tokens between concurrent requests"""
+
+    def __init__(self, tokens: List[str], max_concurrency: int = 32, buffer: int = 100):
+        """
+        Initialize the rate limiter
+
+        Args:
+            tokens: GitHub tokens to spread requests across
+            max_concurrency: Maximum number of requests in flight
+            buffer: Remaining-request count below which new requests wait for the reset
+        """
+        self.tokens = tokens
+        self.buffer = buffer
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Budgets are unknown until the first response for a token comes back
+        self._remaining: Dict[str, Optional[int]] = {token: None for token in tokens}
+        self._reset_at: Dict[str, float] = {token: 0.0 for token in tokens}
+
+    def _budget(self, token: str) -> int:
+        """Remaining budget of a token, treating an unknown budget as unused"""
+        remaining = self._remaining[token]
+        return 5000 if remaining is None else remaining
+
+    async def acquire(self) -> str:
+        """
+        Wait for a request slot and pick the token with the most remaining budget
+
+        Returns:
+            Token to authenticate the request with
+        """
+        await self._semaphore.acquire()
+        token = max(self.tokens, key=self._budget)
+
+        if self._budget(token) < self.buffer:
+            delay = self._reset_at[token] - time.time()
+            if delay > 0:
+                logger.warning(f"GitHub rate limit nearly exhausted, waiting {delay:.0f}s for reset")
+                await asyncio.sleep(delay)
+            self._remaining[token] = None
+
+        return token
+
+    def release(self):
+        """Free the request slot taken by acquire()"""
+        self._semaphore.release()
+
+    async def update_from_response(self, response: httpx.Response):
+        """Response event hook that records the budget reported by GitHub"""
+        token = response.request.headers.get("Authorization", "").removeprefix("Bearer ")
+        # GraphQL has its own points budget, reported in the query's rateLimit field
+        if token not in self._remaining or response.request.url.path == "/graphql":
+            return
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is not None:
+            self._remaining[token] = int(remaining)
+        if reset is not None:
+            self._reset_at[token] = float(reset)
+
+    def retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """
+        Work out how long to wait before retrying a throttled response
+
+        Args:
+            response: Response to inspect
+            attempt: Zero-based number of the attempt that produced the response
+
+        Returns:
+            Seconds to wait, or None if the response was not rate limited
+        """
+        if response.status_code not in (403, 429):
+            return None
+
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            return float(retry_after)
+
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = response.headers.get("X-RateLimit-Reset")
+            if reset is not None:
+                return max(float(reset) - time.time(), 1.0)
+
+        # A plain 403 is a permission problem, only secondary rate limits are worth retrying
+        if response.status_code == 403 and "rate limit" not in response.text.lower():
+            return None
+
+        return float(min(2 ** attempt, MAX_BACKOFF_SECONDS))
@@ -1,10 +1,41 @@
+import json
 import logging
 from typing import Dict, Any, List
 
+# orjson is optional; it serializes the card several times faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Jira statuses that count as a completed task
+_DONE_STATES = frozenset({"Done", "Closed", "Resolved"})
+
+
+def _tb(text: str, **kwargs) -> Dict[str, Any]:
+    """Build a wrapping Adaptive Card TextBlock"""
+    return {"type": "TextBlock", "text": text, "wrap": True, **kwargs}
+
+
+def _more(count: int, label: str, limit: int = 5, **kwargs) -> List[Dict[str, Any]]:
+    """Build the subtle "...and N more" note for a list cut off at limit items, if any"""
+    if count <= limit:
+        return []
+    return [_tb(f"...and {count - limit} more {label}", isSubtle=True, **kwargs)]
+
+
+def _preview(text: str, limit: int = 500) -> str:
+    """Shorten text to at most limit characters, cutting at the last space so no word is split"""
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit] + "…"
+
+
 class TeamsFormatter:
     """Formats collected data into Microsoft Teams messages"""
     
@@ -26,9 +57,14 @@ class TeamsFormatter:
             ai_summary: AI-generated summary text
             
         Returns:
-            Formatted Teams card as a dictionary
+            Formatted Teams card as a dictionary. It only contains plain JSON types
+            (no datetime or Decimal), so it can be passed straight to to_payload()
         """
-        # Create the base card
+        # Create the base card with its header
+        body = [
+            _tb(f"🌅 Good morning, {self.team_name}!", weight="Bolder", size="Large"),
+            _tb("Here's your daily project digest:")
+        ]
         card = {
             "type": "message",
             "attachments": [
@@ -36,7 +72,7 @@ class TeamsFormatter:
                     "contentType": "application/vnd.microsoft.card.adaptive",
                     "content": {
                         "type": "AdaptiveCard",
-                        "body": [],
+                        "body": body,
                         "$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
                         "version": "1.2"
                     }
@@ -44,36 +80,12 @@ class TeamsFormatter:
             ]
         }
         
-        # Add header
-        card["attachments"][0]["content"]["body"].append({
-            "type": "TextBlock",
-            "text": f"🌅 Good morning, {self.team_name}!",
-            "weight": "Bolder",
-            "size": "Large",
-            "wrap": True
-        })
-        
-        card["attachments"][0]["content"]["body"].append({
-            "type": "TextBlock",
-            "text": "Here's your daily project digest:",
-            "wrap": True
-        })
-        
         # Add AI Summary section
         if ai_summary:
-            card["attachments"][0]["content"]["body"].append({
-                "type": "TextBlock",
-                "text": "💡 AI Summary",
-                "weight": "Bolder",
-                "size": "Medium",
-                "spacing": "Medium"
-            })
-            
-            card["attachments"][0]["content"]["body"].append({
-                "type": "TextBlock",
-                "text": ai_summary,
-                "wrap": True
-            })
+            body.extend([
+                _tb("💡 AI Summary", weight="Bolder", size="Medium", spacing="Medium"),
+                _tb(ai_summary)
+            ])
         
         # Add Jira section if data exists
         jira_data = data.get("jira", {})
@@ -96,146 +108,81 @@ class TeamsFormatter:
         
         # If no data was found
         if (not jira_data or not any(jira_data.values())) and (not github_data or not any(github_data.values())):
-            card["attachments"][0]["content"]["body"].append({
-                "type": "TextBlock",
-                "text": "No updates found for today. It's a quiet day! 😊",
-                "wrap": True,
-                "spacing": "Medium"
-            })
+            body.append(_tb("No updates found for today. It's a quiet day! 😊", spacing="Medium"))
         
         return card
     
+    def to_payload(self, card: Dict[str, Any]) -> bytes:
+        """
+        Serialize a card into the JSON body to POST to the Teams webhook
+        
+        Args:
+            card: Card returned by format_daily_digest
+            
+        Returns:
+            UTF-8 encoded JSON, to send with Content-Type: application/json
+        """
+        if orjson is not None:
+            return orjson.dumps(card)
+        return json.dumps(card, ensure_ascii=False).encode("utf-8")
+    
     def _add_jira_section(self, card: Dict[str, Any], jira_data: Dict[str, Any]):
         """Add Jira data to the Teams card"""
         body = card["attachments"][0]["content"]["body"]
         
         # Add section header
-        body.append({
-            "type": "TextBlock",
-            "text": "🧩 Jira Updates",
-            "weight": "Bolder",
-            "size": "Medium",
-            "spacing": "Medium"
-        })
+        blocks = [_tb("🧩 Jira Updates", weight="Bolder", size="Medium", spacing="Medium")]
         
-        # Add new tickets info
+        # Add new tickets info (details limited to 5)
         new_tickets = jira_data.get("new_tickets", [])
         if new_tickets:
-            body.append({
-                "type": "TextBlock",
-                "text": f"📥 {len(new_tickets)} new tickets were created yesterday:",
-                "wrap": True
-            })
-            
-            # Add ticket details (limited to 5)
-            for ticket in new_tickets[:5]:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"• {ticket['key']}: {ticket['summary']} ({ticket['status']})",
-                    "wrap": True
-                })
-            
-            if len(new_tickets) > 5:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"...and {len(new_tickets) - 5} more new tickets",
-                    "isSubtle": True,
-                    "wrap": True
-                })
+            blocks.append(_tb(f"📥 {len(new_tickets)} new tickets were created yesterday:"))
+            blocks.extend(_tb(f"• {ticket['key']}: {ticket['summary']} ({ticket['status']})") for ticket in new_tickets[:5])
+            blocks.extend(_more(len(new_tickets), "new tickets"))
         else:
-            body.append({
-                "type": "TextBlock", 
-                "text": "No new tickets created yesterday.",
-                "wrap": True
-            })
+            blocks.append(_tb("No new tickets created yesterday."))
         
-        # Add blocked tasks
+        # Add blocked tasks (details limited to 5)
         blocked_tasks = jira_data.get("blocked_tasks", [])
         if blocked_tasks:
-            body.append({
-                "type": "TextBlock",
-                "text": f"⚠️ {len(blocked_tasks)} tasks are currently blocked:",
-                "wrap": True,
-                "spacing": "Medium"
-            })
-            
-            # Add blocked task details (limited to 5)
-            for task in blocked_tasks[:5]:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"• {task['key']}: {task['summary']} (Assigned to: {task['assignee']})",
-                    "wrap": True
-                })
-            
-            if len(blocked_tasks) > 5:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"...and {len(blocked_tasks) - 5} more blocked tasks",
-                    "isSubtle": True,
-                    "wrap": True
-                })
+            blocks.append(_tb(f"⚠️ {len(blocked_tasks)} tasks are currently blocked:", spacing="Medium"))
+            blocks.extend(_tb(f"• {task['key']}: {task['summary']} (Assigned to: {task['assignee']})") for task in blocked_tasks[:5])
+            blocks.extend(_more(len(blocked_tasks), "blocked tasks"))
         
         # Add recently completed tasks
         status_changes = jira_data.get("status_changes", [])
-        completed = []
-        if status_changes:
-            for change in status_changes:
-                for sc in change.get("status_changes", []):
-                    if sc.get("to") in ["Done", "Closed", "Resolved"]:
-                        completed.append({
-                            "key": change["key"],
-                            "summary": change["summary"],
-                            "author": sc["author"],
-                            "time": sc["time"]
-                        })
-            
-            if completed:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"✅ {len(completed)} tasks were completed yesterday:",
-                    "wrap": True,
-                    "spacing": "Medium"
-                })
-                
-                # Add completed task details (limited to 5)
-                for task in completed[:5]:
-                    body.append({
-                        "type": "TextBlock",
-                        "text": f"• {task['key']}: {task['summary']} (by {task['author']})",
-                        "wrap": True
-                    })
-                
-                if len(completed) > 5:
-                    body.append({
-                        "type": "TextBlock",
-                        "text": f"...and {len(completed) - 5} more completed tasks",
-                        "isSubtle": True,
-                        "wrap": True
-                    })
+        completed = [
+            {
+                "key": change["key"],
+                "summary": change["summary"],
+                "author": sc["author"],
+                "time": sc["time"]
+            }
+            for change in status_changes
+            for sc in change.get("status_changes", ())
+            if sc.get("to") in _DONE_STATES
+        ]
+        
+        # Add completed task details (limited to 5)
+        if completed:
+            blocks.append(_tb(f"✅ {len(completed)} tasks were completed yesterday:", spacing="Medium"))
+            blocks.extend(_tb(f"• {task['key']}: {task['summary']} (by {task['author']})") for task in completed[:5])
+            blocks.extend(_more(len(completed), "completed tasks"))
+        
+        body.extend(blocks)
     
     def _add_github_section(self, card: Dict[str, Any], github_data: Dict[str, Any]):
         """Add GitHub data to the Teams card"""
         body = card["attachments"][0]["content"]["body"]
         
         # Add section header
-        body.append({
-            "type": "TextBlock",
-            "text": "🛠️ GitHub Activity",
-            "weight": "Bolder",
-            "size": "Medium",
-            "spacing": "Medium"
-        })
+        blocks = [_tb("🛠️ GitHub Activity", weight="Bolder", size="Medium", spacing="Medium")]
         
-        # Add open PRs info
+        # Add open PRs info (details limited to 5)
         open_prs = github_data.get("open_prs", [])
         if open_prs:
-            body.append({
-                "type": "TextBlock",
-                "text": f"🔄 {len(open_prs)} open pull requests waiting for review:",
-                "wrap": True
-            })
+            blocks.append(_tb(f"🔄 {len(open_prs)} open pull requests waiting for review:"))
             
-            # Add PR details (limited to 5)
             for pr in open_prs[:5]:
                 reviewer_text = ""
                 if pr.get("reviewers"):
@@ -243,77 +190,27 @@ class TeamsFormatter:
                     if len(pr['reviewers']) > 2:
                         reviewer_text += f" +{len(pr['reviewers']) - 2} more"
                 
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"• #{pr['number']}: {pr['title']} by {pr['author']}{reviewer_text}",
-                    "wrap": True
-                })
+                blocks.append(_tb(f"• #{pr['number']}: {pr['title']} by {pr['author']}{reviewer_text}"))
             
-            if len(open_prs) > 5:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"...and {len(open_prs) - 5} more open PRs",
-                    "isSubtle": True,
-                    "wrap": True
-                })
+            blocks.extend(_more(len(open_prs), "open PRs"))
         else:
-            body.append({
-                "type": "TextBlock",
-                "text": "No open pull requests waiting for review.",
-                "wrap": True
-            })
+            blocks.append(_tb("No open pull requests waiting for review."))
         
-        # Add recent merges
+        # Add recent merges (details limited to 5)
         recent_merges = github_data.get("recent_merges", [])
         if recent_merges:
-            body.append({
-                "type": "TextBlock",
-                "text": f"✅ {len(recent_merges)} pull requests were merged yesterday:",
-                "wrap": True,
-                "spacing": "Medium"
-            })
-            
-            # Add merge details (limited to 5)
-            for pr in recent_merges[:5]:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"• #{pr['number']}: {pr['title']} by {pr['author']}",
-                    "wrap": True
-                })
-            
-            if len(recent_merges) > 5:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"...and {len(recent_merges) - 5} more merged PRs",
-                    "isSubtle": True,
-                    "wrap": True
-                })
+            blocks.append(_tb(f"✅ {len(recent_merges)} pull requests were merged yesterday:", spacing="Medium"))
+            blocks.extend(_tb(f"• #{pr['number']}: {pr['title']} by {pr['author']}") for pr in recent_merges[:5])
+            blocks.extend(_more(len(recent_merges), "merged PRs"))
         
-        # Add urgent commits
+        # Add urgent commits (details limited to 5)
         urgent_commits = github_data.get("urgent_commits", [])
         if urgent_commits:
-            body.append({
-                "type": "TextBlock",
-                "text": f"🚨 {len(urgent_commits)} urgent commits detected yesterday:",
-                "wrap": True,
-                "spacing": "Medium"
-            })
-            
-            # Add commit details (limited to 5)
-            for commit in urgent_commits[:5]:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"• {commit['sha']}: {commit['message']} by {commit['author']}",
-                    "wrap": True
-                })
-            
-            if len(urgent_commits) > 5:
-                body.append({
-                    "type": "TextBlock",
-                    "text": f"...and {len(urgent_commits) - 5} more urgent commits",
-                    "isSubtle": True,
-                    "wrap": True
-                })
+            blocks.append(_tb(f"🚨 {len(urgent_commits)} urgent commits detected yesterday:", spacing="Medium"))
+            blocks.extend(_tb(f"• {commit['sha']}: {commit['message']} by {commit['author']}") for commit in urgent_commits[:5])
+            blocks.extend(_more(len(urgent_commits), "urgent commits"))
+        
+        body.extend(blocks)
     
     # NEW METHOD: Add PR analyses section
     def _add_pr_analyses_section(self, card: Dict[str, Any], pr_analyses: List[Dict[str, Any]]):
@@ -321,72 +218,33 @@ class TeamsFormatter:
         body = card["attachments"][0]["content"]["body"]
         
         # Add section header
-        body.append({
-            "type": "TextBlock",
-            "text": "🔍 Pull Request Analyses",
-            "weight": "Bolder",
-            "size": "Medium",
-            "spacing": "Medium"
-        })
+        body.append(_tb("🔍 Pull Request Analyses", weight="Bolder", size="Medium", spacing="Medium"))
         
         if not pr_analyses:
-            body.append({
-                "type": "TextBlock",
-                "text": "No PR analyses available.",
-                "wrap": True
-            })
+            body.append(_tb("No PR analyses available."))
             return
         
         # Add each PR analysis (limited to 3 to keep the card manageable)
+        blocks = []
         for analysis in pr_analyses[:3]:
             pr_number = analysis.get("pr_number")
             repo = analysis.get("repo", "")
             title = analysis.get("title", "Untitled PR")
             author = analysis.get("author", "Unknown")
-            analysis_text = analysis.get("analysis", "No analysis available")
+            # Only a short preview of the analysis goes on the card
+            analysis_text = _preview(analysis.get("analysis", "No analysis available"))
             url = analysis.get("url", "")
             
-            # Add PR title and info
-            body.append({
-                "type": "TextBlock",
-                "text": f"**PR #{pr_number}: {title}**",
-                "weight": "Bolder",
-                "wrap": True,
-                "spacing": "Medium"
-            })
-            
-            body.append({
-                "type": "TextBlock", 
-                "text": f"Repository: {repo} | Author: {author}",
-                "isSubtle": True,
-                "wrap": True
-            })
-            
-            # Add separator
-            body.append({
-                "type": "TextBlock",
-                "text": "---",
-                "wrap": True
-            })
-            
-            # Add analysis content - make it collapsible if it's long
-            if len(analysis_text) > 500:
-                # Summary version
-                body.append({
-                    "type": "TextBlock",
-                    "text": analysis_text[:500] + "...",
-                    "wrap": True
-                })
-            else:
-                body.append({
-                    "type": "TextBlock",
-                    "text": analysis_text,
-                    "wrap": True
-                })
+            blocks.extend([
+                _tb(f"**PR #{pr_number}: {title}**", weight="Bolder", spacing="Medium"),
+                _tb(f"Repository: {repo} | Author: {author}", isSubtle=True),
+                _tb("---"),
+                _tb(analysis_text)
+            ])
             
             # Add action button to view PR if URL is available
             if url:
-                body.append({
+                blocks.append({
                     "type": "ActionSet",
                     "actions": [
                         {
@@ -398,14 +256,9 @@ class TeamsFormatter:
                 })
         
         # Add note about limited analyses
-        if len(pr_analyses) > 3:
-            body.append({
-                "type": "TextBlock",
-                "text": f"...and {len(pr_analyses) - 3} more PR analyses",
-                "isSubtle": True,
-                "wrap": True,
-                "spacing": "Small"
-            })
+        blocks.extend(_more(len(pr_analyses), "PR analyses", limit=3, spacing="Small"))
+        
+        body.extend(blocks)
     
     # NEW METHOD: Add database insights section
     def _add_database_section(self, card: Dict[str, Any], db_data: Dict[str, Any]):
@@ -417,32 +270,23 @@ class TeamsFormatter:
         if not activity_stats:
             return
         
-        # Add section header
-        body.append({
-            "type": "TextBlock",
-            "text": "📊 Weekly Database Insights",
-            "weight": "Bolder",
-            "size": "Medium",
-            "spacing": "Medium"
-        })
-        
-        # Add weekly stats
-        weekly_stats_text = f"• {activity_stats.get('weekly_prs', 0)} PRs this week\n"
-        weekly_stats_text += f"• {activity_stats.get('weekly_tickets', 0)} tickets created\n"
-        weekly_stats_text += f"• {activity_stats.get('weekly_completed', 0)} tickets completed\n"
-        
-        body.append({
-            "type": "TextBlock",
-            "text": weekly_stats_text,
-            "wrap": True
-        })
+        # Add section header and weekly stats
+        weekly_stats_text = (
+            f"• {activity_stats.get('weekly_prs', 0)} PRs this week\n"
+            f"• {activity_stats.get('weekly_tickets', 0)} tickets created\n"
+            f"• {activity_stats.get('weekly_completed', 0)} tickets completed\n"
+        )
+        blocks = [
+            _tb("📊 Weekly Database Insights", weight="Bolder", size="Medium", spacing="Medium"),
+            _tb(weekly_stats_text)
+        ]
         
         # Add team metrics if available
         team_metrics = db_data.get("team_metrics", {})
         if team_metrics:
-            body.append({
-                "type": "TextBlock",
-                "text": f"Team size: {team_metrics.get('member_count', 0)} members | {team_metrics.get('github_users', 0)} using GitHub",
-                "wrap": True,
-                "isSubtle": True
-            })
+            blocks.append(_tb(
+                f"Team size: {team_metrics.get('member_count', 0)} members | {team_metrics.get('github_users', 0)} using GitHub",
+                isSubtle=True
+            ))
+        
+        body.extend(blocks)
@@ -1,98 +1,499 @@
+import asyncio
+import functools
+import hashlib
+import inspect
 import logging
 import json
 import os
-import boto3
-from typing import Dict, Any
-from dotenv import load_dotenv
+import re
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Any, Callable, Coroutine, Iterator, List, Optional, Tuple
+
+# orjson is optional; it encodes request bodies and parses responses faster than the json module
+try:
+    import orjson
+    _json_dumps, _json_loads = orjson.dumps, orjson.loads
+except ImportError:
+    _json_dumps, _json_loads = json.dumps, json.loads
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Model IDs (or inference profiles containing them) that support latency-optimized inference
+_LATENCY_OPTIMIZED_MODELS = ("anthropic.claude-3-5-haiku",)
+
+# Model IDs (or inference profiles containing them) that accept cache_control content blocks;
+# other models reject the request, so the instructions are sent without it
+_PROMPT_CACHING_MODELS = (
+    "anthropic.claude-3-5-haiku",
+    "anthropic.claude-3-7-sonnet",
+    "anthropic.claude-sonnet-4",
+    "anthropic.claude-opus-4",
+)
+
+# Patches longer than this are left out of the collector's debug copy of the PR prompt
+MAX_INLINE_PATCH_BYTES = 3000
+
+# Estimated tokens of file listings and patches per PR analysis prompt. Tokens are estimated
+# at CHARS_PER_TOKEN characters each, close enough for budgeting without a tokenizer dependency
+TOKEN_BUDGET = 6000
+CHARS_PER_TOKEN = 4
+
+# Characters kept from the start and end of the patch that no longer fits the token budget
+PATCH_HEAD_CHARS = 1500
+PATCH_TAIL_CHARS = 500
+
+# Listed in place of the patch of files GitHub returns without one; charged to the budget like a patch
+_DIFF_TOO_LARGE_MARKER = "[Diff too large to include]"
+
+# Static instructions are sent as their own leading content block so they are
+# byte-identical across calls and can be served from Claude's prompt cache
+SUMMARY_INSTRUCTIONS = """You are a helpful assistant for a software team. Your task is to create a concise, informative daily update based on the team's data that follows.
+Focus on actionable insights and highlight the most important issues that need attention. Also mention any positive accomplishments.
+
+Based on this data, please provide:
+1. A brief summary (2-3 sentences) highlighting the most important information
+2. Key observations about current status and blockers
+3. Any connections between different issues (e.g., if GitHub commits relate to Jira tickets)
+4. Suggested priorities or actions for the team
+
+Your response should be professional but friendly in tone, around 150-200 words total.
+"""
+
+PR_ANALYSIS_INSTRUCTIONS = """You are a senior software engineer.
+Summarize the pull request that follows in plain English.
+Then suggest 3-5 relevant unit test cases based on the logic in the diff.
+"""
+
+# Streamed generations are stopped as soon as the output matches this (refusals, prompt leakage),
+# instead of paying for the rest of max_tokens. Each chunk is searched together with the last
+# _STREAM_GUARD_OVERLAP characters before it, so matches split across chunks are still found. A match
+# at the very end of the text so far is held back until the next chunk shows whether the word ends there
+_STREAM_GUARD_RE = re.compile(r"(?i)\b(?:I cannot|as an AI language model|ignore previous)\b")
+_STREAM_GUARD_OVERLAP = 200
+_STREAM_GUARD_NOTICE = "\n\n[Response stopped early by the content guard]"
+
+# Summaries of recently seen prompts, so an unchanged digest doesn't pay for a second model call.
+# Keys are (prompt hash, hour), which makes entries expire within the hour they were created
+SUMMARY_CACHE_SIZE = 128
+_summary_cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
+# Templates for the variable parts of the prompts, filled in with format_map
+_PROMPT_TEMPLATE = """
+TEAM: {team_name}
+
+===== JIRA DATA =====
+{jira_section}
+
+===== GITHUB DATA =====
+{github_section}
+"""
+
+_PR_HEADER_TEMPLATE = """Pull Request: {title}
+Author: {user}
+Description: {body}
+
+Changed files:"""
+
+
+def truncate_patch(patch: str) -> str:
+    """
+    Keep only the first PATCH_HEAD_CHARS and last PATCH_TAIL_CHARS characters of a long patch
+
+    Applying it to an already truncated patch returns it unchanged.
+    """
+    if len(patch) <= PATCH_HEAD_CHARS + PATCH_TAIL_CHARS:
+        return patch
+    return f"{patch[:PATCH_HEAD_CHARS]}\n...[truncated]...\n{patch[-PATCH_TAIL_CHARS:]}"
+
+
+async def _maybe_await(value: Any) -> Any:
+    """Await the result of an aioboto3 call; results of boto3 calls are returned as they are"""
+    return await value if inspect.isawaitable(value) else value
+
+
+def _run_unsuspended(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine that never suspends, such as _call_model with a boto3 operation,
+    without an event loop
+    """
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("Coroutine suspended outside an event loop")
+
+
+def _estimate_tokens(text: str) -> int:
+    """Estimate the number of Claude tokens in a piece of text"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _get_cached_summary(key: Tuple[str, int]) -> Optional[str]:
+    """Look up a cached summary, marking it as recently used"""
+    with _summary_cache_lock:
+        summary = _summary_cache.get(key)
+        if summary is not None:
+            _summary_cache.move_to_end(key)
+        return summary
+
+
+def _cache_summary(key: Tuple[str, int], summary: str):
+    """Store a summary, evicting the least recently used one when the cache is full"""
+    # Output cut short by the stream guard is returned once but never reused
+    if summary.endswith(_STREAM_GUARD_NOTICE):
+        return
+    with _summary_cache_lock:
+        _summary_cache[key] = summary
+        _summary_cache.move_to_end(key)
+        if len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+
+
+def _render_section(title: str, items: List[Dict[str, Any]], fmt: Callable[[Dict[str, Any]], str],
+                    more_label: str, empty_msg: str, limit: int = 5) -> str:
+    """
+    Render one titled list of the summary prompt
+    
+    Args:
+        title: Section title
+        items: Items of the section; only the first limit are formatted
+        fmt: Formats one item as a "- ..." line
+        more_label: Describes the items left out, as in "Plus 3 more <more_label>"
+        empty_msg: Shown after the title when there are no items
+        limit: Maximum number of items to list
+    
+    Returns:
+        The section text
+    """
+    count = len(items)
+    if not count:
+        return f"{title}: {empty_msg}"
+    
+    lines = [f"{title} ({count}):"]
+    lines.extend(map(fmt, islice(items, limit)))
+    if count > limit:
+        lines.append(f"- Plus {count - limit} more {more_label}")
+    return "\n".join(lines)
+
+
+# boto3, botocore, aioboto3 and dotenv are imported on first use rather than with this module, so
+# importing it (as the collector does) doesn't load the AWS SDK and works without boto3 installed
+@functools.lru_cache(maxsize=None)
+def _load_env():
+    """Load environment variables from .env, once per process"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+@functools.lru_cache(maxsize=None)
+def _client_config():
+    """Client config with a pool sized for concurrent PR analyses and adaptive retries on throttling"""
+    from botocore.config import Config
+    return Config(max_pool_connections=32, retries={"mode": "adaptive"})
+
+
+@functools.lru_cache(maxsize=4)
+def _get_bedrock_client(region: Optional[str], access_key_id: Optional[str],
+                        secret_access_key: Optional[str], session_token: Optional[str]):
+    """
+    Create a bedrock-runtime client, shared by every summarizer with the same region and credentials
+    
+    Building a session and client resolves credentials and loads botocore's service data,
+    so it is done once per process rather than once per BedrockSummarizer.
+    """
+    import boto3
+    session = boto3.Session(
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_access_key,
+        aws_session_token=session_token,
+        region_name=region
+    )
+    return session.client('bedrock-runtime', config=_client_config())
+
+
 class BedrockSummarizer:
     """Uses Amazon Bedrock's Claude model to generate summaries"""
     
     def __init__(self):
         """Initialize Bedrock client"""
         # Load environment variables if not already loaded
-        load_dotenv()
+        _load_env()
         
         self.aws_region = os.getenv("AWS_REGION")
-        self.model_id = os.getenv("BEDROCK_MODEL_ID")
-        self.max_tokens = 1000
+        # A provisioned-throughput model ARN, when set, is invoked instead of the on-demand model ID
+        # so scheduled runs don't wait in the on-demand queue
+        self.provisioned_model_arn = os.getenv("BEDROCK_PROVISIONED_MODEL_ARN")
+        self.model_id = self.provisioned_model_arn or os.getenv("BEDROCK_MODEL_ID")
+        # Output caps; summaries are asked for 150-200 words, PR analyses also list test cases
+        self.summary_max_tokens = int(os.getenv("SUMMARY_MAX_TOKENS", "400"))
+        self.custom_max_tokens = int(os.getenv("CUSTOM_MAX_TOKENS", "1000"))
+        self.pr_analysis_max_tokens = int(os.getenv("PR_ANALYSIS_MAX_TOKENS", "1000"))
+        # Mark the static instructions with cache_control so repeated calls reuse the cached prefix,
+        # on models that support prompt caching
+        self.prompt_caching = (
+            os.getenv("BEDROCK_PROMPT_CACHING", "true").lower() == "true"
+            and any(m in (self.model_id or "") for m in _PROMPT_CACHING_MODELS)
+        )
+        # "optimized" requests latency-optimized inference on models that support it, "standard" disables it
+        self.performance_mode = os.getenv("BEDROCK_PERFORMANCE_MODE", "optimized")
+        
+        credentials = {
+            "aws_access_key_id": os.getenv("AWS_ACCESS_KEY_ID"),
+            "aws_secret_access_key": os.getenv("AWS_SECRET_ACCESS_KEY"),
+            "aws_session_token": os.getenv("AWS_SESSION_TOKEN"),
+            "region_name": self.aws_region
+        }
         
         self.client = None
         try:
             # Initialize Bedrock client with credentials
-            session = boto3.Session(
-                aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-                aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-                aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
-                region_name=self.aws_region
+            self.client = _get_bedrock_client(
+                self.aws_region,
+                credentials["aws_access_key_id"],
+                credentials["aws_secret_access_key"],
+                credentials["aws_session_token"]
             )
-            
-            self.client = session.client('bedrock-runtime')
             logger.info("Bedrock client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Bedrock client: {str(e)}")
+        
+        # Factory for non-blocking clients; each call enters one as an async context manager.
+        # aioboto3 is optional; without it the async (a-prefixed) methods run the sync client in a worker thread
+        self.client_factory = None
+        try:
+            import aioboto3
+            aio_session = aioboto3.Session(**credentials)
+            self.client_factory = lambda: aio_session.client('bedrock-runtime', config=_client_config())
+        except ImportError:
+            pass
+        except Exception as e:
+            logger.error(f"Failed to initialize async Bedrock session: {str(e)}")
+    
+    def _build_request_body(self, prompt: str, instructions: Optional[str] = None,
+                            max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Build the Anthropic messages request body for a prompt
+        
+        Args:
+            prompt: Variable part of the prompt
+            instructions: Static instructions placed before the prompt as a cacheable block
+            max_tokens: Output token cap, custom_max_tokens if not given
+        
+        Returns:
+            Request body dictionary
+        """
+        content = []
+        if instructions:
+            instructions_block = {
+                "type": "text",
+                "text": instructions
+            }
+            if self.prompt_caching:
+                instructions_block["cache_control"] = {"type": "ephemeral"}
+            content.append(instructions_block)
+        
+        content.append({
+            "type": "text",
+            "text": prompt
+        })
+        
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens or self.custom_max_tokens,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ]
+        }
+    
+    def _invoke_kwargs(self, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the keyword arguments shared by invoke_model and invoke_model_with_response_stream"""
+        kwargs = {
+            "modelId": self.model_id,
+            "body": _json_dumps(request_body)
+        }
+        if self.performance_mode != "standard" and any(m in self.model_id for m in _LATENCY_OPTIMIZED_MODELS):
+            kwargs["performanceConfigLatency"] = self.performance_mode
+        return kwargs
     
-    def generate_summary(self, data: Dict[str, Any], team_name: str) -> str:
+    def _latency_rejected(self, kwargs: Dict[str, Any], error: Exception) -> bool:
+        """
+        Check whether a failed call was rejected because of the latency setting; if so,
+        switch to standard latency for this and later calls
+        """
+        from botocore.exceptions import ClientError
+        
+        if "performanceConfigLatency" not in kwargs:
+            return False
+        if isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") != "ValidationException":
+            return False
+        
+        logger.warning(f"Latency-optimized inference not available, falling back to standard: {str(error)}")
+        self.performance_mode = "standard"
+        del kwargs["performanceConfigLatency"]
+        return True
+    
+    async def _call_model(self, operation: Callable[..., Any], request_body: Dict[str, Any]) -> Any:
+        """
+        Call a model operation, retrying at standard latency if latency-optimized inference is rejected
+        
+        Args:
+            operation: invoke_model or invoke_model_with_response_stream of a boto3 client,
+                or invoke_model of an aioboto3 client (whose result is awaited)
+            request_body: Request body to send
+        
+        Returns:
+            The operation's response
+        """
+        from botocore.exceptions import ClientError, ParamValidationError
+        
+        kwargs = self._invoke_kwargs(request_body)
+        try:
+            return await _maybe_await(operation(**kwargs))
+        except (ClientError, ParamValidationError) as e:
+            if not self._latency_rejected(kwargs, e):
+                raise
+            return await _maybe_await(operation(**kwargs))
+    
+    def _invoke_model(self, request_body: Dict[str, Any], stream: bool = False) -> Dict[str, Any]:
+        """Call invoke_model (or its streaming variant) with the sync client"""
+        operation = self.client.invoke_model_with_response_stream if stream else self.client.invoke_model
+        return _run_unsuspended(self._call_model(operation, request_body))
+    
+    def _response_text(self, response_body: Dict[str, Any]) -> str:
+        """Extract the generated text from a response body, logging the tokens it used"""
+        usage = response_body.get('usage', {})
+        logger.info(f"Bedrock usage: {usage.get('input_tokens')} input tokens, {usage.get('output_tokens')} output tokens")
+        return response_body.get('content', [{}])[0].get('text', '')
+    
+    def _summary_cache_key(self, prompt: str) -> Tuple[str, int]:
+        """Build the summary cache key for a prompt sent to the configured model"""
+        digest = hashlib.blake2b(f"{self.model_id}\0{prompt}".encode("utf-8"), digest_size=16).hexdigest()
+        return digest, int(time.time() // 3600)
+    
+    def _stream_text(self, request_body: Dict[str, Any]) -> Iterator[str]:
+        """
+        Invoke the model with response streaming and yield text as it is generated
+        
+        Args:
+            request_body: Request body from _build_request_body
+        
+        Returns:
+            Iterator over text deltas; if the stream guard trips, the text before the match
+            followed by _STREAM_GUARD_NOTICE
+        """
+        response = self._invoke_model(request_body, stream=True)
+        event_stream = response.get('body')
+        
+        tail = ""  # Text already yielded, searched again with the next chunk
+        pending = ""  # Text held back because it starts with a match the next chunk may still extend
+        for event in event_stream:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            payload = _json_loads(chunk['bytes'])
+            if payload.get('type') == 'content_block_delta':
+                window = tail + pending + payload.get('delta', {}).get('text', '')
+                start = len(tail)
+                matches = list(_STREAM_GUARD_RE.finditer(window))
+                match = next((m for m in matches if m.end() < len(window)), None)
+                if match:
+                    logger.warning(f"Stopping generation, output matched the stream guard: {match.group(0)!r}")
+                    event_stream.close()
+                    yield window[start:max(match.start(), start)]
+                    yield _STREAM_GUARD_NOTICE
+                    return
+                
+                held = max(matches[-1].start(), start) if matches else len(window)
+                yield window[start:held]
+                pending = window[held:]
+                tail = window[:held][-_STREAM_GUARD_OVERLAP:]
+            elif payload.get('type') == 'message_start':
+                usage = payload.get('message', {}).get('usage', {})
+                logger.info(f"Bedrock usage: {usage.get('input_tokens')} input tokens")
+        
+        # The output ended right after a match, so it stands
+        if pending:
+            logger.warning(f"Stopping generation, output matched the stream guard: {pending!r}")
+            yield _STREAM_GUARD_NOTICE
+    
+    def stream_summary(self, data: Dict[str, Any], team_name: str) -> Iterator[str]:
+        """
+        Generate a summary of the collected data, yielding text as soon as Claude produces it
+        
+        Args:
+            data: Dictionary containing the collected data
+            team_name: Name of the team
+        
+        Returns:
+            Iterator over chunks of AI-generated summary text
+        """
+        simple_summary, prompt = self._summary_prompt(data, team_name)
+        if simple_summary is not None:
+            yield simple_summary
+            return
+        
+        yield from self._invoke_stream(prompt, self.summary_max_tokens, SUMMARY_INSTRUCTIONS,
+                                       cache=True, label="AI summary")
+    
+    def generate_summary(self, data: Dict[str, Any], team_name: str, stream: bool = False) -> str:
         """
         Generate a summary of the collected data using Bedrock's Claude model
         
         Args:
             data: Dictionary containing the collected data
             team_name: Name of the team
+            stream: Receive the response through invoke_model_with_response_stream
         
         Returns:
             AI-generated summary text
         """
-        if not self.client or not self.model_id:
-            logger.error("Bedrock client not initialized or model ID not provided")
-            return "Unable to generate AI summary due to configuration issues."
+        simple_summary, prompt = self._summary_prompt(data, team_name)
+        if simple_summary is not None:
+            return simple_summary
+        
+        return self._invoke(prompt, self.summary_max_tokens, SUMMARY_INSTRUCTIONS, stream,
+                            cache=True, label="AI summary")
+    
+    def _summary_prompt(self, data: Dict[str, Any], team_name: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Build the summary prompt, or the local summary to use instead when there is nothing to summarize
+        
+        Returns:
+            (simple_summary, prompt), exactly one of which is set
+        """
+        # Nothing to summarize, so skip the model call and use the local template
+        if self._activity_count(data) == 0:
+            logger.info(f"No activity for {team_name}, using the simple summary instead of Bedrock")
+            return self.generate_simple_summary(data, team_name), None
         
         # Create the prompt for Claude
         prompt = self._create_prompt(data, team_name)
         logger.debug(f"Generated prompt for AI summary: {prompt}")
-        
-        try:
-            # Create request body
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": self.max_tokens,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ]
-            }
-            
-            # Invoke the model
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
-            )
-            
-            # Parse the response
-            response_body = json.loads(response.get('body').read())
-            summary = response_body.get('content', [{}])[0].get('text', '')
-            
-            logger.info("Successfully generated AI summary")
-            return summary
-            
-        except Exception as e:
-            logger.error(f"Error generating summary with Bedrock: {str(e)}")
-            return f"Unable to generate AI summary. Error: {str(e)}"
+        return None, prompt
+    
+    def _activity_count(self, data: Dict[str, Any]) -> int:
+        """Count the Jira and GitHub items a summary would be about"""
+        jira_data = data.get('jira', {})
+        github_data = data.get('github', {})
+        return (
+            sum(len(jira_data.get(k, [])) for k in ('new_tickets', 'status_changes', 'blocked_tasks')) +
+            sum(len(github_data.get(k, [])) for k in ('open_prs', 'recent_merges', 'urgent_commits'))
+        )
     
     def _create_prompt(self, data: Dict[str, Any], team_name: str) -> str:
         """
-        Create a prompt for the AI model based on the collected data
+        Create the variable part of the summary prompt from the collected data
+        (the static part is SUMMARY_INSTRUCTIONS)
         
         Args:
             data: Dictionary containing the collected data
@@ -101,115 +502,55 @@ class BedrockSummarizer:
         Returns:
             Formatted prompt string
         """
-        # Extract data for the prompt
-        jira_data = data.get('jira', {})
-        github_data = data.get('github', {})
-        
-        # Format Jira data
-        jira_section = self._format_jira_for_prompt(jira_data)
-        
-        # Format GitHub data
-        github_section = self._format_github_for_prompt(github_data)
-        
-        # Create the complete prompt
-        prompt = f"""
-You are a helpful assistant for the {team_name} team. Your task is to create a concise, informative daily update based on the data below.
-Focus on actionable insights and highlight the most important issues that need attention. Also mention any positive accomplishments.
-
-===== JIRA DATA =====
-{jira_section}
-
-===== GITHUB DATA =====
-{github_section}
-
-Based on this data, please provide:
-1. A brief summary (2-3 sentences) highlighting the most important information
-2. Key observations about current status and blockers
-3. Any connections between different issues (e.g., if GitHub commits relate to Jira tickets)
-4. Suggested priorities or actions for the team
-
-Your response should be professional but friendly in tone, around 150-200 words total.
-"""
-        return prompt
+        # Create the data part of the prompt; the instructions are sent separately
+        return _PROMPT_TEMPLATE.format_map({
+            'team_name': team_name,
+            'jira_section': self._format_jira_for_prompt(data.get('jira', {})),
+            'github_section': self._format_github_for_prompt(data.get('github', {}))
+        })
     
     def _format_jira_for_prompt(self, jira_data: Dict[str, Any]) -> str:
         """Format Jira data for the prompt"""
-        sections = []
-        
-        # New tickets
-        new_tickets = jira_data.get('new_tickets', [])
-        if new_tickets:
-            sections.append(f"NEW TICKETS ({len(new_tickets)}):")
-            for ticket in new_tickets[:5]:  # Limit to 5
-                sections.append(f"- {ticket['key']}: {ticket['summary']} ({ticket['status']})")
-            if len(new_tickets) > 5:
-                sections.append(f"- Plus {len(new_tickets) - 5} more new tickets")
-        else:
-            sections.append("NEW TICKETS: None in the last 24 hours")
-        
-        # Status changes
-        status_changes = jira_data.get('status_changes', [])
-        if status_changes:
-            sections.append(f"\nSTATUS CHANGES ({len(status_changes)}):")
-            for change in status_changes[:5]:  # Limit to 5
-                last_change = change['status_changes'][-1]
-                sections.append(f"- {change['key']}: Changed from '{last_change['from']}' to '{last_change['to']}' by {last_change['author']}")
-            if len(status_changes) > 5:
-                sections.append(f"- Plus {len(status_changes) - 5} more status changes")
-        else:
-            sections.append("\nSTATUS CHANGES: None in the last 24 hours")
-        
-        # Blocked tasks
-        blocked_tasks = jira_data.get('blocked_tasks', [])
-        if blocked_tasks:
-            sections.append(f"\nBLOCKED TASKS ({len(blocked_tasks)}):")
-            for task in blocked_tasks[:5]:  # Limit to 5
-                sections.append(f"- {task['key']}: {task['summary']} (Assigned to: {task['assignee']})")
-            if len(blocked_tasks) > 5:
-                sections.append(f"- Plus {len(blocked_tasks) - 5} more blocked tasks")
-        else:
-            sections.append("\nBLOCKED TASKS: None currently")
-        
-        return "\n".join(sections)
+        return "\n\n".join([
+            _render_section(
+                "NEW TICKETS", jira_data.get('new_tickets', []),
+                lambda ticket: f"- {ticket['key']}: {ticket['summary']} ({ticket['status']})",
+                "new tickets", "None in the last 24 hours"
+            ),
+            _render_section(
+                "STATUS CHANGES", jira_data.get('status_changes', []),
+                lambda change: (
+                    f"- {change['key']}: Changed from '{change['status_changes'][-1]['from']}' "
+                    f"to '{change['status_changes'][-1]['to']}' by {change['status_changes'][-1]['author']}"
+                ),
+                "status changes", "None in the last 24 hours"
+            ),
+            _render_section(
+                "BLOCKED TASKS", jira_data.get('blocked_tasks', []),
+                lambda task: f"- {task['key']}: {task['summary']} (Assigned to: {task['assignee']})",
+                "blocked tasks", "None currently"
+            )
+        ])
     
     def _format_github_for_prompt(self, github_data: Dict[str, Any]) -> str:
         """Format GitHub data for the prompt"""
-        sections = []
-        
-        # Open PRs
-        open_prs = github_data.get('open_prs', [])
-        if open_prs:
-            sections.append(f"OPEN PULL REQUESTS ({len(open_prs)}):")
-            for pr in open_prs[:5]:  # Limit to 5
-                sections.append(f"- #{pr['number']} {pr['title']} by {pr['author']} ({pr['days_open']} days open)")
-            if len(open_prs) > 5:
-                sections.append(f"- Plus {len(open_prs) - 5} more open PRs")
-        else:
-            sections.append("OPEN PULL REQUESTS: None currently")
-        
-        # Recent merges
-        recent_merges = github_data.get('recent_merges', [])
-        if recent_merges:
-            sections.append(f"\nRECENT MERGES ({len(recent_merges)}):")
-            for pr in recent_merges[:5]:  # Limit to 5
-                sections.append(f"- #{pr['number']} {pr['title']} by {pr['author']}")
-            if len(recent_merges) > 5:
-                sections.append(f"- Plus {len(recent_merges) - 5} more recent merges")
-        else:
-            sections.append("\nRECENT MERGES: None in the last 24 hours")
-        
-        # Urgent commits
-        urgent_commits = github_data.get('urgent_commits', [])
-        if urgent_commits:
-            sections.append(f"\nURGENT COMMITS ({len(urgent_commits)}):")
-            for commit in urgent_commits[:5]:  # Limit to 5
-                sections.append(f"- {commit['sha']} {commit['message']} by {commit['author']}")
-            if len(urgent_commits) > 5:
-                sections.append(f"- Plus {len(urgent_commits) - 5} more urgent commits")
-        else:
-            sections.append("\nURGENT COMMITS: None in the last 24 hours")
-        
-        return "\n".join(sections)
+        return "\n\n".join([
+            _render_section(
+                "OPEN PULL REQUESTS", github_data.get('open_prs', []),
+                lambda pr: f"- #{pr['number']} {pr['title']} by {pr['author']} ({pr['days_open']} days open)",
+                "open PRs", "None currently"
+            ),
+            _render_section(
+                "RECENT MERGES", github_data.get('recent_merges', []),
+                lambda pr: f"- #{pr['number']} {pr['title']} by {pr['author']}",
+                "recent merges", "None in the last 24 hours"
+            ),
+            _render_section(
+                "URGENT COMMITS", github_data.get('urgent_commits', []),
+                lambda commit: f"- {commit['sha']} {commit['message']} by {commit['author']}",
+                "urgent commits", "None in the last 24 hours"
+            )
+        ])
     
     def analyze_pr_diff(self, diff_data: Dict[str, Any]) -> str:
         """
@@ -223,83 +564,253 @@ Your response should be professional but friendly in tone, around 150-200 words
         prompt = self._build_pr_analysis_prompt(diff_data)
         
         # Use the custom text generation method
-        return self.generate_custom_text(prompt)
+        return self.generate_custom_text(prompt, instructions=PR_ANALYSIS_INSTRUCTIONS,
+                                         max_tokens=self.pr_analysis_max_tokens)
     
     def _build_pr_analysis_prompt(self, diff_data: Dict[str, Any]) -> str:
-        """Build a prompt for PR analysis"""
+        """Build the variable part of the PR analysis prompt (see PR_ANALYSIS_INSTRUCTIONS)"""
         # Create the prompt for AI analysis
-        prompt = f"""You are a senior software engineer.
-Summarize this pull request in plain English.
-Then suggest 3-5 relevant unit test cases based on the logic in the diff.
-
-Pull Request: {diff_data.get('title')}
-Author: {diff_data.get('user')}
-Description: {diff_data.get('body', 'No description provided.')}
+        parts = [_PR_HEADER_TEMPLATE.format_map({
+            'title': diff_data.get('title'),
+            'user': diff_data.get('user'),
+            'body': diff_data.get('body', 'No description provided.')
+        })]
 
-Changed files:
-"""
-
-        # Add file changes to prompt
-        for file in diff_data.get("files", []):
-            prompt += f"\nFile: {file.get('filename')}"
-            prompt += f"\nStatus: {file.get('status')}"
-            prompt += f"\nChanges: +{file.get('additions')} -{file.get('deletions')} lines"
+        # Add file changes to prompt, smallest changes first so as many files as possible fit the budget.
+        # The first patch that doesn't fit is cut down to its head and tail and later files are skipped
+        files = sorted(diff_data.get("files", []), key=lambda f: (f.get("additions") or 0) + (f.get("deletions") or 0))
+        omitted = 0
+        budget = TOKEN_BUDGET
+        for index, file in enumerate(files):
+            # Headers alone can use up the budget on PRs with hundreds of files
+            if budget <= 0:
+                omitted += len(files) - index
+                break
+            
+            filename, status, additions, deletions, patch = (
+                file.get('filename'), file.get('status'), file.get('additions'), file.get('deletions'),
+                file.get('patch')
+            )
+            header = f"\nFile: {filename}\nStatus: {status}\nChanges: +{additions} -{deletions} lines"
+            parts.append(header)
+            budget -= _estimate_tokens(header)
             
-            # Add the patch/diff if it's not too large
-            patch = file.get("patch")
-            if patch and len(patch) < 3000:  # Limit patch size
-                prompt += f"\n```\n{patch}\n```\n"
-            else:
-                prompt += "\n[Diff too large to include]\n"
+            if not patch:
+                parts.append(_DIFF_TOO_LARGE_MARKER)
+                budget -= _estimate_tokens(_DIFF_TOO_LARGE_MARKER)
+                continue
+            
+            block = f"```\n{patch}\n```"
+            cost = _estimate_tokens(block)
+            if cost <= budget:
+                parts.append(block)
+                budget -= cost
+                continue
+            
+            # The head and tail are only added if they fit what is left of the budget
+            excerpt = f"```\n{truncate_patch(patch)}\n```"
+            if _estimate_tokens(excerpt) <= budget:
+                parts.append(excerpt)
+            omitted += len(files) - index - 1
+            break
+        
+        if omitted:
+            parts.append(f"\n[{omitted} more files omitted]")
         
-        return prompt
+        return "\n".join(parts)
 
-    def generate_custom_text(self, prompt: str) -> str:
+    def generate_custom_text(self, prompt: str, stream: bool = False, instructions: Optional[str] = None,
+                             max_tokens: Optional[int] = None) -> str:
         """
         Generate custom text based on the given prompt
         Args:
             prompt: The prompt to send to the AI model
+            stream: Receive the response through invoke_model_with_response_stream
+            instructions: Static instructions sent ahead of the prompt as a cacheable block
+            max_tokens: Output token cap, custom_max_tokens if not given
         Returns:
             AI-generated text
         """
-        if not self.client or not self.model_id:
+        return self._invoke(prompt, max_tokens or self.custom_max_tokens, instructions, stream)
+
+    # _invoke, _invoke_stream and _ainvoke are the only paths to the model. Each wraps its call in
+    # _begin (configuration check, cache lookup), _complete (cache store, logging) and _fail
+    def _begin(self, prompt: str, cache: bool, label: str,
+               client_ready: bool) -> Tuple[Optional[str], Optional[Tuple[str, int]]]:
+        """
+        Run the checks shared by every model call
+        
+        Args:
+            prompt: Variable part of the prompt
+            cache: Whether the result may come from (and goes into) the summary cache
+            label: What is being generated, for log and error messages
+            client_ready: Whether a client for this kind of call is available
+        
+        Returns:
+            (early_result, cache_key); early_result is a configuration error or cached text
+            to return instead of calling the model
+        """
+        if not client_ready or not self.model_id:
             logger.error("Bedrock client not initialized or model ID not provided")
-            return "Unable to generate text due to configuration issues."
+            return f"Unable to generate {label} due to configuration issues.", None
+        
+        cache_key = self._summary_cache_key(prompt) if cache else None
+        if cache_key:
+            cached = _get_cached_summary(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached {label}")
+                return cached, cache_key
+        return None, cache_key
+    
+    def _complete(self, text: str, cache_key: Optional[Tuple[str, int]], label: str) -> str:
+        """Store a successful result in the summary cache if requested and log it"""
+        if cache_key:
+            _cache_summary(cache_key, text)
+        logger.info(f"Successfully generated {label}")
+        return text
+    
+    def _fail(self, error: Exception, label: str) -> str:
+        """Log a failed model call and build the message returned in place of the text"""
+        logger.error(f"Error generating {label} with Bedrock: {str(error)}")
+        return f"Unable to generate {label}. Error: {str(error)}"
+
+    def _invoke(self, prompt: str, max_tokens: int, instructions: Optional[str] = None, stream: bool = False,
+                cache: bool = False, label: str = "text") -> str:
+        """
+        Send a prompt to the model and return the generated text
+        
+        Args:
+            prompt: Variable part of the prompt
+            max_tokens: Output token cap
+            instructions: Static instructions sent ahead of the prompt as a cacheable block
+            stream: Receive the response through invoke_model_with_response_stream
+            cache: Reuse the result of an identical prompt from the last hour, and store this one
+            label: What is being generated, for log and error messages
+        
+        Returns:
+            Generated text, or an error message if it could not be generated
+        """
+        if stream:
+            return "".join(self._invoke_stream(prompt, max_tokens, instructions, cache, label))
+        
+        early_result, cache_key = self._begin(prompt, cache, label, self.client is not None)
+        if early_result is not None:
+            return early_result
         
         try:
-            # Create request body
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": self.max_tokens,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ]
-            }
-            
-            # Invoke the model
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
-            )
-            
-            # Parse the response
-            response_body = json.loads(response.get('body').read())
-            generated_text = response_body.get('content', [{}])[0].get('text', '')
-            
-            logger.info("Successfully generated text with AI")
-            return generated_text
-            
+            request_body = self._build_request_body(prompt, instructions, max_tokens)
+            generated_text = self._response_text(self._read_response_body(request_body))
+        except Exception as e:
+            return self._fail(e, label)
+        return self._complete(generated_text, cache_key, label)
+    
+    def _invoke_stream(self, prompt: str, max_tokens: int, instructions: Optional[str] = None,
+                       cache: bool = False, label: str = "text") -> Iterator[str]:
+        """Streaming version of _invoke, yielding text as soon as Claude produces it"""
+        early_result, cache_key = self._begin(prompt, cache, label, self.client is not None)
+        if early_result is not None:
+            yield early_result
+            return
+        
+        chunks = []
+        try:
+            for chunk in self._stream_text(self._build_request_body(prompt, instructions, max_tokens)):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            yield self._fail(e, label)
+            return
+        self._complete("".join(chunks), cache_key, label)
+    
+    async def _ainvoke(self, prompt: str, max_tokens: int, instructions: Optional[str] = None,
+                       cache: bool = False, label: str = "text") -> str:
+        """Async version of _invoke"""
+        early_result, cache_key = self._begin(prompt, cache, label,
+                                              self.client_factory is not None or self.client is not None)
+        if early_result is not None:
+            return early_result
+        
+        try:
+            generated_text = await self._ainvoke_text(self._build_request_body(prompt, instructions, max_tokens))
         except Exception as e:
-            logger.error(f"Error generating text with Bedrock: {str(e)}")
-            return f"Unable to generate text. Error: {str(e)}"
+            return self._fail(e, label)
+        return self._complete(generated_text, cache_key, label)
+
+    def _read_response_body(self, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        """Invoke the model with the sync client and read the whole response body"""
+        response = self._invoke_model(request_body)
+        return _json_loads(response.get('body').read())
+    
+    async def _ainvoke_text(self, request_body: Dict[str, Any]) -> str:
+        """Invoke the model without blocking the event loop and return the generated text"""
+        if self.client_factory is None:
+            # Without aioboto3, run the blocking call and body read in a worker thread;
+            # boto3 clients are thread-safe, so concurrent calls can share self.client
+            response_body = await asyncio.to_thread(self._read_response_body, request_body)
+            return self._response_text(response_body)
+        
+        async with self.client_factory() as client:
+            response = await self._call_model(client.invoke_model, request_body)
+            response_body = _json_loads(await response['body'].read())
+        
+        return self._response_text(response_body)
+    
+    async def agenerate_summary(self, data: Dict[str, Any], team_name: str) -> str:
+        """
+        Async version of generate_summary, so several summaries can be awaited concurrently
+        
+        Args:
+            data: Dictionary containing the collected data
+            team_name: Name of the team
+        
+        Returns:
+            AI-generated summary text
+        """
+        simple_summary, prompt = self._summary_prompt(data, team_name)
+        if simple_summary is not None:
+            return simple_summary
+        
+        return await self._ainvoke(prompt, self.summary_max_tokens, SUMMARY_INSTRUCTIONS,
+                                   cache=True, label="AI summary")
+    
+    async def generate_summaries(self, per_team_data: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Generate the summaries of several teams concurrently
+        
+        Args:
+            per_team_data: Collected data keyed by team name
+        
+        Returns:
+            AI-generated summary text keyed by team name
+        """
+        summaries = await asyncio.gather(
+            *(self.agenerate_summary(data, team_name) for team_name, data in per_team_data.items())
+        )
+        return dict(zip(per_team_data, summaries))
+    
+    async def agenerate_custom_text(self, prompt: str, instructions: Optional[str] = None,
+                                    max_tokens: Optional[int] = None) -> str:
+        """
+        Async version of generate_custom_text
+        Args:
+            prompt: The prompt to send to the AI model
+            instructions: Static instructions sent ahead of the prompt as a cacheable block
+            max_tokens: Output token cap, custom_max_tokens if not given
+        Returns:
+            AI-generated text
+        """
+        return await self._ainvoke(prompt, max_tokens or self.custom_max_tokens, instructions)
+    
+    async def aanalyze_pr_diff(self, diff_data: Dict[str, Any]) -> str:
+        """
+        Async version of analyze_pr_diff
+        Args:
+            diff_data: Dictionary with PR diff information
+        Returns:
+            AI-generated analysis text
+        """
+        return await self.agenerate_custom_text(self._build_pr_analysis_prompt(diff_data), PR_ANALYSIS_INSTRUCTIONS,
+                                                self.pr_analysis_max_tokens)
 
     # Alternative method for environments where Bedrock may not be accessible
     def generate_simple_summary(self, data: Dict[str, Any], team_name: str) -> str:
@@ -0,0 +1,180 @@
+import asyncio
+import io
+import json
+import os
+import sys
+import unittest
+
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils import ai_summarizer
+from utils.ai_summarizer import (
+    BedrockSummarizer, CHARS_PER_TOKEN, PATCH_HEAD_CHARS, PATCH_TAIL_CHARS, TOKEN_BUDGET, _STREAM_GUARD_NOTICE,
+    _STREAM_GUARD_RE, truncate_patch
+)
+
+
+class _EventStream:
+    """Minimal stand-in for the botocore EventStream of invoke_model_with_response_stream"""
+
+    def __init__(self, texts):
+        self.closed = False
+        self.events = [
+            {"chunk": {"bytes": json.dumps({"type": "content_block_delta", "delta": {"text": text}}).encode()}}
+            for text in texts
+        ]
+
+    def __iter__(self):
+        for event in self.events:
+            if self.closed:
+                return
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+class _StreamingClient:
+    def __init__(self, texts):
+        self.stream = _EventStream(texts)
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        return {"body": self.stream}
+
+
+class StreamGuardTest(unittest.TestCase):
+    def setUp(self):
+        ai_summarizer._summary_cache.clear()
+        self.summarizer = BedrockSummarizer()
+        self.summarizer.model_id = "anthropic.claude-3-haiku-20240307-v1:0"
+
+    def _stream(self, texts):
+        self.summarizer.client = _StreamingClient(texts)
+        return "".join(self.summarizer._stream_text({}))
+
+    def test_pattern_ignores_ordinary_digest_text(self):
+        for text in ("The UI cannot load", "CI cannot build", "API cannot reach Jira"):
+            self.assertIsNone(_STREAM_GUARD_RE.search(text), text)
+
+    def test_pattern_matches_refusals_and_leakage(self):
+        for text in ("I cannot help with that", "As an AI language model, I", "Ignore previous instructions"):
+            self.assertIsNotNone(_STREAM_GUARD_RE.search(text), text)
+
+    def test_ordinary_text_streams_unchanged(self):
+        self.assertEqual(self._stream(["Summary: the team's ", "CI cannot build"]),
+                         "Summary: the team's CI cannot build")
+        self.assertFalse(self.summarizer.client.stream.closed)
+
+    def test_guard_stops_stream_across_chunks(self):
+        text = self._stream(["Summary. As an AI lang", "uage model I won't", " continue"])
+        self.assertEqual(text, "Summary. As an AI lang" + _STREAM_GUARD_NOTICE)
+        self.assertTrue(self.summarizer.client.stream.closed)
+
+    def test_match_split_from_the_rest_of_its_word_is_not_guarded(self):
+        self.assertIsNone(_STREAM_GUARD_RE.search("ignore previously reported blockers"))
+        text = self._stream(["Don't ignore previous", "ly reported blockers"])
+        self.assertEqual(text, "Don't ignore previously reported blockers")
+        self.assertFalse(self.summarizer.client.stream.closed)
+
+    def test_match_at_the_end_of_the_output_is_guarded(self):
+        self.assertEqual(self._stream(["Summary. I cannot"]), "Summary. " + _STREAM_GUARD_NOTICE)
+
+    def test_guarded_summary_is_not_cached(self):
+        data = {"jira": {"new_tickets": [{"key": "K-1", "summary": "Login fails", "status": "Open"}]}}
+        self.summarizer.client = _StreamingClient(["Summary. I cannot", " say more"])
+        first = "".join(self.summarizer.stream_summary(data, "Team"))
+        self.assertTrue(first.endswith(_STREAM_GUARD_NOTICE))
+        self.assertEqual(len(ai_summarizer._summary_cache), 0)
+
+        self.summarizer.client = _StreamingClient(["All good"])
+        self.assertEqual("".join(self.summarizer.stream_summary(data, "Team")), "All good")
+        self.assertEqual(len(ai_summarizer._summary_cache), 1)
+
+
+class _LatencyRejectingClient:
+    """Sync or aioboto3-style client that rejects latency-optimized requests like an unsupported region"""
+
+    def __init__(self, is_async=False):
+        self.is_async = is_async
+        self.calls = []
+
+    def _respond(self, kwargs):
+        self.calls.append(sorted(kwargs))
+        if "performanceConfigLatency" in kwargs:
+            raise ClientError({"Error": {"Code": "ValidationException", "Message": "latency"}}, "InvokeModel")
+        return json.dumps({"content": [{"text": "Summary"}]}).encode()
+
+    def invoke_model(self, **kwargs):
+        if not self.is_async:
+            return {"body": io.BytesIO(self._respond(kwargs))}
+
+        async def invoke():
+            body = self._respond(kwargs)
+
+            class Body:
+                async def read(self):
+                    return body
+            return {"body": Body()}
+        return invoke()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class LatencyFallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.summarizer = BedrockSummarizer()
+        self.summarizer.model_id = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
+        self.summarizer.performance_mode = "optimized"
+
+    def test_sync_call_retries_at_standard_latency(self):
+        self.summarizer.client = client = _LatencyRejectingClient()
+        self.assertEqual(self.summarizer.generate_custom_text("prompt"), "Summary")
+        self.assertEqual(client.calls, [["body", "modelId", "performanceConfigLatency"], ["body", "modelId"]])
+        self.assertEqual(self.summarizer.performance_mode, "standard")
+
+    def test_async_call_retries_at_standard_latency(self):
+        client = _LatencyRejectingClient(is_async=True)
+        self.summarizer.client_factory = lambda: client
+        self.assertEqual(asyncio.run(self.summarizer.agenerate_custom_text("prompt")), "Summary")
+        self.assertEqual(client.calls, [["body", "modelId", "performanceConfigLatency"], ["body", "modelId"]])
+        self.assertEqual(self.summarizer.performance_mode, "standard")
+
+
+class TruncatePatchTest(unittest.TestCase):
+    def test_keeps_head_and_tail_of_long_patches(self):
+        patch = "h" * PATCH_HEAD_CHARS + "m" * 10000 + "t" * PATCH_TAIL_CHARS
+        truncated = truncate_patch(patch)
+        self.assertTrue(truncated.startswith("h" * PATCH_HEAD_CHARS + "\n"))
+        self.assertTrue(truncated.endswith("\n" + "t" * PATCH_TAIL_CHARS))
+        self.assertNotIn("m", truncated)
+        self.assertEqual(truncate_patch(truncated), truncated)
+
+    def test_short_patches_are_unchanged(self):
+        self.assertEqual(truncate_patch("+line"), "+line")
+
+
+class PrAnalysisPromptTest(unittest.TestCase):
+    def test_patchless_files_are_charged_to_the_budget(self):
+        files = [{"filename": f"src/file_{i}.py", "status": "modified", "additions": 1, "deletions": 1}
+                 for i in range(800)]
+        prompt = BedrockSummarizer()._build_pr_analysis_prompt({"title": "T", "user": "u", "files": files})
+        self.assertLess(len(prompt), (TOKEN_BUDGET + 200) * CHARS_PER_TOKEN)
+        self.assertIn("more files omitted]", prompt)
+
+    def test_overflow_excerpt_is_charged_to_the_budget(self):
+        files = [{"filename": f"src/file_{i}.py", "status": "modified", "additions": 5000 if i % 2 == 0 else 3,
+                  "deletions": 0, "patch": truncate_patch("+line of code\n" * 5000) if i % 2 == 0 else "+small\n" * 3}
+                 for i in range(200)]
+        prompt = BedrockSummarizer()._build_pr_analysis_prompt({"title": "T", "user": "u", "files": files})
+        self.assertLess(len(prompt), (TOKEN_BUDGET + 200) * CHARS_PER_TOKEN)
+        self.assertEqual(prompt.count("+small"), 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
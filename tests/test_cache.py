@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from collectors.cache import GhCache
+
+URL = "https://api.github.com/repos/org/repo/pulls?state=open"
+
+
+class GhCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = GhCache(os.path.join(self.tmp.name, "gh.db"))
+        self.addCleanup(self.cache.conn.close)
+
+    def test_stores_validators_body_and_link(self):
+        self.assertEqual(self.cache.get_headers(URL), (None, None))
+        self.assertIsNone(self.cache.get_body(URL))
+
+        self.cache.put(URL, '"v1"', "Mon, 12 Oct 2026 10:00:00 GMT", b"[1]", '<next>; rel="next"')
+
+        self.assertEqual(self.cache.get_headers(URL), ('"v1"', "Mon, 12 Oct 2026 10:00:00 GMT"))
+        self.assertEqual(self.cache.get_body(URL), (b"[1]", '<next>; rel="next"'))
+
+    def test_evicts_stale_entries_only(self):
+        self.cache.put(URL, '"v1"', None, b"[1]")
+        self.cache.put(URL + "&page=2", '"v2"', None, b"[2]")
+        self.cache.conn.execute("UPDATE resp SET fetched_at = 0 WHERE url = ?", (URL,))
+
+        self.cache.evict(30)
+
+        self.assertIsNone(self.cache.get_body(URL))
+        self.assertEqual(self.cache.get_body(URL + "&page=2"), (b"[2]", None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import asyncio
+import functools
+import os
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from collectors import github_collector
+from collectors.github_collector import GithubCollector, PR_PROMPT_BUDGET
+
+
+def _iso(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class CollectorTestCase(unittest.TestCase):
+    """Runs a GithubCollector against an httpx.MockTransport serving self.handle"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        env = mock.patch.dict(os.environ, {
+            "GITHUB_TOKEN": "token",
+            "GITHUB_TOKENS": "",
+            "GITHUB_REPOS": "org/repo",
+            "GITHUB_CACHE_PATH": os.path.join(self.tmp.name, "gh.db"),
+        })
+        env.start()
+        self.addCleanup(env.stop)
+
+        self.requests = []
+        transport = httpx.MockTransport(self._record)
+        client = mock.patch.object(github_collector.httpx, "AsyncClient",
+                                   functools.partial(httpx.AsyncClient, transport=transport))
+        client.start()
+        self.addCleanup(client.stop)
+
+        self.collector = GithubCollector()
+        self.addCleanup(self.collector.cache.conn.close)
+
+    def _record(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.handle(request)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404)
+
+
+class RecentMergesTest(CollectorTestCase):
+    def handle(self, request):
+        now = datetime.now(timezone.utc)
+        if request.url.path == "/repos/org/repo/pulls":
+            return httpx.Response(200, json=[
+                {"number": 5, "title": "Merged", "html_url": "u", "user": {"login": "dev"},
+                 "merged_at": _iso(now - timedelta(hours=1)), "updated_at": _iso(now - timedelta(hours=1))},
+                {"number": 4, "title": "Old", "html_url": "u", "user": {"login": "dev"},
+                 "merged_at": _iso(now - timedelta(days=3)), "updated_at": _iso(now - timedelta(days=3))},
+            ])
+        if request.url.path == "/repos/org/repo/pulls/5":
+            return httpx.Response(200, json={"merged_by": {"login": "lead"}})
+        return super().handle(request)
+
+    def test_returns_merges_without_logging_errors(self):
+        with self.assertNoLogs("collectors.github_collector", level="ERROR"):
+            merges = self.collector.get_recent_merges()
+
+        self.assertEqual([(pr["number"], pr["merged_by"]) for pr in merges], [(5, "lead")])
+
+
+class RequestTest(CollectorTestCase):
+    def _request(self, url, **kwargs):
+        async def run():
+            async with self.collector._http_client() as client:
+                return await self.collector._request(client, "GET", url, **kwargs)
+        return asyncio.run(run())
+
+    def test_retries_secondary_rate_limit(self):
+        responses = [
+            httpx.Response(403, text="You have exceeded a secondary rate limit", headers={"Retry-After": "0"}),
+            httpx.Response(200, json=[1]),
+        ]
+        self.handle = lambda request: responses.pop(0)
+
+        self.assertEqual(self._request("/repos/org/repo/pulls").json(), [1])
+        self.assertEqual(len(self.requests), 2)
+
+    def test_plain_403_is_not_retried(self):
+        self.handle = lambda request: httpx.Response(403, text="Resource not accessible by integration")
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            self._request("/repos/org/repo/pulls")
+        self.assertEqual(len(self.requests), 1)
+
+    def test_concurrent_clients_keep_their_own_limiter(self):
+        self.handle = lambda request: httpx.Response(200, json=[], headers={"X-RateLimit-Remaining": "4000"})
+
+        async def run():
+            async with self.collector._http_client() as first, self.collector._http_client() as second:
+                # The second client's budget is spent; requests on the first must not wait for its reset
+                second.rate_limiter._remaining["token"] = 0
+                second.rate_limiter._reset_at["token"] = time.time() + 3600
+                await asyncio.wait_for(self.collector._request(first, "GET", "/repos/org/repo/pulls"), 1)
+                return first.rate_limiter, second.rate_limiter
+
+        first_limiter, second_limiter = asyncio.run(run())
+        self.assertEqual(first_limiter._remaining["token"], 4000)
+        self.assertEqual(second_limiter._remaining["token"], 0)
+
+
+class ConditionalRequestTest(CollectorTestCase):
+    def handle(self, request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        if request.url.path == "/repos/org/repo/commits":
+            now = datetime.now(timezone.utc)
+            return httpx.Response(200, headers={"ETag": '"v1"'}, json=[
+                {"sha": "abcdef123", "html_url": "u", "author": {"login": "dev"},
+                 "commit": {"message": "Hotfix crash", "author": {"name": "Dev", "date": _iso(now)}}}
+            ])
+        return httpx.Response(200, json=[{"number": 1}], headers={
+            "ETag": '"v1"', "Link": '<https://api.github.com/repos/org/repo/pulls?page=2>; rel="next"'
+        })
+
+    def _get_twice(self, url, **kwargs):
+        async def run():
+            async with self.collector._http_client() as client:
+                first = await self.collector._request(client, "GET", url, **kwargs)
+                second = await self.collector._request(client, "GET", url, **kwargs)
+            return first, second
+        return asyncio.run(run())
+
+    def test_not_modified_replays_cached_body_and_link(self):
+        first, second = self._get_twice("/repos/org/repo/pulls")
+
+        self.assertEqual(self.requests[1].headers.get("If-None-Match"), '"v1"')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second.links["next"]["url"], "https://api.github.com/repos/org/repo/pulls?page=2")
+
+    def test_uncached_requests_are_not_conditional(self):
+        self._get_twice("/repos/org/repo/pulls", cache=False)
+
+        self.assertNotIn("If-None-Match", self.requests[1].headers)
+        self.assertEqual(self.collector.cache.get_headers(str(self.requests[0].url)), (None, None))
+
+    def test_commit_list_is_not_cached(self):
+        self.assertEqual([c["sha"] for c in self.collector.get_urgent_commits()], ["abcdef1"])
+        self.assertEqual(self.collector.cache.get_headers(str(self.requests[0].url)), (None, None))
+
+
+class AnalyzePrTest(CollectorTestCase):
+    def test_keeps_every_file_and_the_patches_of_the_smallest_changes(self):
+        # Alternating 5000-line and 3-line files, the small ones spread over the whole PR
+        files = [
+            SimpleNamespace(filename=f"src/file_{i}.py", status="modified", additions=5000 if i % 2 == 0 else 3,
+                            deletions=0, patch="+line of code\n" * 5000 if i % 2 == 0 else "+small\n" * 3)
+            for i in range(200)
+        ]
+        pr = SimpleNamespace(title="Big PR", body="", user=None, created_at=datetime.now(timezone.utc),
+                             html_url="u", get_files=lambda: files)
+        self.collector.client = mock.Mock()
+        self.collector.client.get_repo.return_value.get_pull.return_value = pr
+        self.collector.ai_summarizer = mock.Mock()
+        self.collector.ai_summarizer.analyze_pr_diff.return_value = "analysis"
+
+        self.assertEqual(self.collector.analyze_pr("org/repo", 1)["analysis"], "analysis")
+
+        kept = self.collector.ai_summarizer.analyze_pr_diff.call_args.args[0]["files"]
+        self.assertEqual(len(kept), 200)
+        self.assertTrue(all(file["patch"] for file in kept if file["additions"] == 3))
+        self.assertLessEqual(sum(len(file["patch"] or "") for file in kept), PR_PROMPT_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from collectors import rate_limiter
+from collectors.rate_limiter import GhRateLimiter, MAX_BACKOFF_SECONDS
+
+
+def _response(status_code: int, token: str = "a", text: str = "", **headers) -> httpx.Response:
+    request = httpx.Request("GET", "https://api.github.com/repos/org/repo", headers={"Authorization": f"Bearer {token}"})
+    return httpx.Response(status_code, text=text, headers=headers, request=request)
+
+
+class RetryDelayTest(unittest.TestCase):
+    def setUp(self):
+        self.limiter = GhRateLimiter(["a"])
+
+    def test_successful_response_is_not_retried(self):
+        self.assertIsNone(self.limiter.retry_delay(_response(200), 0))
+
+    def test_retry_after_header_wins(self):
+        self.assertEqual(self.limiter.retry_delay(_response(429, **{"Retry-After": "7"}), 3), 7.0)
+
+    def test_primary_limit_waits_for_reset(self):
+        response = _response(403, **{"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(time.time()) + 30)})
+        self.assertAlmostEqual(self.limiter.retry_delay(response, 0), 30, delta=2)
+
+    def test_plain_403_is_not_retried(self):
+        self.assertIsNone(self.limiter.retry_delay(_response(403, text="Resource not accessible by integration"), 0))
+
+    def test_secondary_limit_backs_off_exponentially_up_to_cap(self):
+        response = _response(403, text="You have exceeded a secondary rate limit")
+        self.assertEqual([self.limiter.retry_delay(response, attempt) for attempt in (0, 1, 3)], [1.0, 2.0, 8.0])
+        self.assertEqual(self.limiter.retry_delay(response, 10), MAX_BACKOFF_SECONDS)
+
+
+class AcquireTest(unittest.IsolatedAsyncioTestCase):
+    async def test_waits_for_reset_below_buffer(self):
+        limiter = GhRateLimiter(["a"], buffer=100)
+        await limiter.update_from_response(
+            _response(200, **{"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": str(int(time.time()) + 60)})
+        )
+
+        with mock.patch.object(rate_limiter.asyncio, "sleep", mock.AsyncMock()) as sleep:
+            self.assertEqual(await limiter.acquire(), "a")
+        limiter.release()
+
+        self.assertAlmostEqual(sleep.await_args.args[0], 60, delta=2)
+        # The budget is unknown again until the next response after the reset
+        self.assertIsNone(limiter._remaining["a"])
+
+    async def test_picks_token_with_most_budget_without_waiting(self):
+        limiter = GhRateLimiter(["a", "b"], buffer=100)
+        await limiter.update_from_response(_response(200, "a", **{"X-RateLimit-Remaining": "5"}))
+        await limiter.update_from_response(_response(200, "b", **{"X-RateLimit-Remaining": "4000"}))
+
+        with mock.patch.object(rate_limiter.asyncio, "sleep", mock.AsyncMock()) as sleep:
+            self.assertEqual(await limiter.acquire(), "b")
+        limiter.release()
+
+        sleep.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()